@@ -1,35 +1,135 @@
-from fastapi import FastAPI, Query, BackgroundTasks
+from fastapi import FastAPI, Query, Request
 import uvicorn
 import os
-import subprocess
+import json
+import time
+import asyncio
+import threading
+from starlette.requests import ClientDisconnect
 from starlette.responses import RedirectResponse
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from textSummarizer.pipeline.prediction import PredictionPipeline
-from textSummarizer.logging import logger
+from typing import Optional
+from textSummarizer.pipeline.exceptions import UnknownAdapterError, UnknownProfileError
+from textSummarizer.pipeline.bulk_stream import iter_ndjson, summarize_stream
+from textSummarizer.pipeline.inference_executor import (
+    InferenceExecutor,
+    QueueFullError,
+    DeadlineExceededError,
+    ExecutorClosedError,
+)
+from textSummarizer.pipeline.training_jobs import (
+    TrainingJobManager,
+    JobAlreadyRunningError,
+    JobNotFoundError,
+)
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.logging import logger, log_request, configure_logging
+from textSummarizer.utils.metrics import BULK_QUEUE_WAIT, IN_FLIGHT, render_metrics
 
 
 app = FastAPI(title="Text Summarization API")
 
-# Load model once at startup
+# Loaded in the background after startup, see load_model()
 prediction_pipeline = None
+inference_executor = None
+training_jobs = None
+
+# Readiness and how long each startup phase took, reported by /ready
+startup_state = {"phase": "starting", "ready": False, "error": None, "timings": {}}
+
+# How often a waiting /predict call checks whether its client is still there
+DISCONNECT_POLL_INTERVAL = 0.25
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model once at startup"""
-    global prediction_pipeline
-    logger.info("Loading prediction pipeline...")
-    prediction_pipeline = PredictionPipeline()
-    logger.info("Prediction pipeline loaded successfully")
+    """Start accepting connections right away and load the model in the background"""
+    global training_jobs
+    config = ConfigurationManager()
+    configure_logging(config.get_logging_config())
+    training_jobs = TrainingJobManager(
+        config.get_training_job_config(),
+        on_success=swap_in_adapter,
+    )
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+
+
+def load_model():
+    """Import the ML stack, load and warm up the model, then start serving"""
+    global prediction_pipeline, inference_executor
+    timings = startup_state["timings"]
+    try:
+        startup_state["phase"] = "import"
+        start = time.perf_counter()
+        # The server never forks after tokenizing, so let the Rust tokenizer
+        # encode batches on several threads; it reads this before its first use
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+        # torch/transformers/peft take seconds to import, keep them off the startup path
+        from textSummarizer.pipeline.prediction import PredictionPipeline
+        timings["import"] = round(time.perf_counter() - start, 3)
+
+        startup_state["phase"] = "load_model"
+        logger.info("Loading prediction pipeline...")
+        pipeline = PredictionPipeline()
+        # An adapter swapped in by a training job before a restart stays live
+        live = training_jobs.live_adapter()
+        if live:
+            pipeline.swap_adapter(live["adapter_path"])
+        timings.update(pipeline.load_timings)
+        logger.info("Prediction pipeline loaded successfully")
+
+        startup_state["phase"] = "warmup"
+        pipeline.warm_up()
+        timings["warmup"] = pipeline.load_timings["warmup"]
+
+        serving_config = pipeline.config
+        executor = InferenceExecutor(
+            pipeline.predict_batch,
+            max_queue_size=serving_config.max_queue_size,
+            request_timeout=serving_config.request_timeout,
+            max_batch_size=serving_config.max_batch_size,
+        )
+        executor.start()
+
+        prediction_pipeline, inference_executor = pipeline, executor
+        startup_state.update(phase="ready", ready=True)
+        logger.info(f"Model ready, startup timings (s): {timings}")
+    except Exception as e:
+        logger.exception(e)
+        startup_state.update(phase="failed", error=str(e))
+
+
+def swap_in_adapter(adapter_path) -> bool:
+    """Hot-swap a freshly trained adapter into the live pipeline
+
+    Returns:
+        bool: whether it was swapped in
+    """
+    if prediction_pipeline is None:
+        logger.warning(f"No prediction pipeline loaded, adapter {adapter_path} was not swapped in")
+        return False
+    prediction_pipeline.swap_adapter(adapter_path)
+    return True
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Fail queued requests fast and stop the inference worker"""
+    if inference_executor is not None:
+        inference_executor.shutdown(timeout=5)
 
 
 class TextRequest(BaseModel):
     text: str
+    adapter: Optional[str] = None
+    profile: Optional[str] = None
 
 
 class SummaryResponse(BaseModel):
-    dialogue: str
+    # Left out of the response when serving.echo_dialogue is off
+    dialogue: Optional[str] = None
     summary: str
+    adapter: str
 
 
 @app.get("/", tags=["root"])
@@ -39,49 +139,221 @@ async def index():
 
 @app.get("/health", tags=["health"])
 async def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up and serving HTTP, the model may still be loading"""
     return {"status": "healthy"}
 
 
+@app.get("/ready", tags=["health"])
+async def readiness_check():
+    """Readiness: 200 once the model is loaded and warmed up, 503 before"""
+    status_code = 200 if startup_state["ready"] else 503
+    # Copy, the loader thread may be adding timings while we serialize
+    return JSONResponse(status_code=status_code, content={**startup_state, "timings": dict(startup_state["timings"])})
+
+
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Prometheus metrics"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/adapters", tags=["prediction"])
+async def list_adapters():
+    """Configured LoRA adapters"""
+    if prediction_pipeline is None:
+        return JSONResponse(status_code=503, content={"error": "Model is not loaded yet"})
+    return {"default": prediction_pipeline.default_adapter, "adapters": sorted(prediction_pipeline.adapters)}
+
+
+@app.get("/profiles", tags=["prediction"])
+async def list_profiles():
+    """Configured generation profiles"""
+    if prediction_pipeline is None:
+        return JSONResponse(status_code=503, content={"error": "Model is not loaded yet"})
+    return {"default": prediction_pipeline.default_profile, "profiles": prediction_pipeline.profiles}
+
+
 @app.post("/train", tags=["training"])
-async def training(background_tasks: BackgroundTasks):
-    """Start training in background"""
+async def training():
+    """Start a training run in the background"""
     try:
-        background_tasks.add_task(run_training)
-        return {"status": "Training started in background"}
+        job = training_jobs.start()
+        return JSONResponse(status_code=202, content=job.to_dict())
+    except JobAlreadyRunningError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
     except Exception as e:
         logger.error(f"Error starting training: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-def run_training():
-    """Run training in background"""
+@app.get("/train/jobs", tags=["training"])
+async def list_training_jobs():
+    """All training jobs started by this server, newest first"""
+    return [job.to_dict() for job in training_jobs.list()]
+
+
+@app.get("/train/{job_id}", tags=["training"])
+async def training_status(job_id: str, tail: int = Query(20, ge=0, le=1000)):
+    """Status of a training job with the last lines of its log"""
     try:
-        logger.info("Starting training...")
-        result = subprocess.run(["python", "main.py"], capture_output=True, text=True)
-        if result.returncode == 0:
-            logger.info("Training completed successfully")
-        else:
-            logger.error(f"Training failed: {result.stderr}")
-    except Exception as e:
-        logger.error(f"Error running training: {e}")
+        job = training_jobs.get(job_id)
+        return {**job.to_dict(), "log_tail": training_jobs.tail(job_id, tail) if tail else []}
+    except JobNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
 
 
-@app.post("/predict", response_model=SummaryResponse, tags=["prediction"])
-async def predict_route(request: TextRequest):
+@app.get("/train/{job_id}/logs", tags=["training"])
+async def training_logs(job_id: str):
+    """Stream a training job's log, following it until the job finishes"""
+    try:
+        job = training_jobs.get(job_id)
+    except JobNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+
+    async def follow():
+        with open(job.log_file, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if chunk:
+                    yield chunk
+                elif job.finished:
+                    return
+                else:
+                    await asyncio.sleep(1)
+
+    return StreamingResponse(follow(), media_type="text/plain")
+
+
+@app.post("/train/{job_id}/cancel", tags=["training"])
+async def cancel_training(job_id: str):
+    """Stop a running training job"""
+    try:
+        return training_jobs.cancel(job_id).to_dict()
+    except JobNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+
+
+async def ensure_adapter_fetched(adapter: str):
+    """Download a cold adapter in a thread before queueing, not on the inference worker"""
+    if not prediction_pipeline.adapter_fetched(adapter):
+        await asyncio.get_running_loop().run_in_executor(None, prediction_pipeline.fetch_adapter, adapter)
+
+
+async def run_until_disconnected(http_request: Request, coro):
+    """Await `coro`, cancelling it (and its queued work) if the client disconnects
+
+    Raises:
+        ClientDisconnect: if the client went away before `coro` finished
+    """
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            task.cancel()
+            raise ClientDisconnect()
+
+
+@app.post("/predict", response_model=SummaryResponse, response_model_exclude_none=True, tags=["prediction"])
+async def predict_route(request: TextRequest, http_request: Request):
     """Generate summary for given text"""
     try:
         if not request.text.strip():
             return JSONResponse(status_code=400, content={"error": "Text cannot be empty"})
+        if inference_executor is None:
+            return JSONResponse(status_code=503, content={"error": "Model is not loaded yet"})
         
-        logger.info(f"Generating summary for text of length: {len(request.text)}")
-        summary = prediction_pipeline.predict(request.text)
+        adapter = prediction_pipeline.resolve_adapter(request.adapter)
+        profile = prediction_pipeline.resolve_profile(request.profile)
         
-        return SummaryResponse(dialogue=request.text, summary=summary)
+        log_request("/predict", "Generating summary", chars=len(request.text), adapter=adapter, profile=profile)
+        with IN_FLIGHT.track_inprogress():
+            await ensure_adapter_fetched(adapter)
+            summary = await run_until_disconnected(http_request, inference_executor.submit(request.text, adapter, profile))
+        
+        dialogue = request.text if prediction_pipeline.config.echo_dialogue else None
+        return SummaryResponse(dialogue=dialogue, summary=summary, adapter=adapter)
+    except (UnknownAdapterError, UnknownProfileError) as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except ClientDisconnect:
+        # Nobody is left to read it, 499 only marks the request in access logs
+        log_request("/predict", "Client disconnected, prediction cancelled")
+        return Response(status_code=499)
+    except QueueFullError as e:
+        logger.warning(f"Rejecting prediction: {e}")
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
+    except (DeadlineExceededError, ExecutorClosedError) as e:
+        logger.warning(f"Prediction not served: {e}")
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error in prediction: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse that can be sent while the request body is still being read
+
+    StreamingResponse watches for disconnects by reading from `receive`, which
+    would steal body chunks from the endpoint; the endpoint's body reader
+    handles disconnects instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.post("/predict/stream", tags=["prediction"])
+async def predict_stream_route(http_request: Request):
+    """Summarize an NDJSON stream of {"id", "text"} records
+
+    Records are batched as they arrive and `{"id", "summary"}` (or
+    `{"id", "error"}`) lines are streamed back as each one finishes, not in
+    input order. Records may also set `adapter` and `profile`.
+    """
+    if inference_executor is None:
+        return JSONResponse(status_code=503, content={"error": "Model is not loaded yet"})
+    serving_config = prediction_pipeline.config
+    # Bulk records queue only below this depth, the rest is kept for /predict
+    bulk_queue_limit = max(1, serving_config.max_queue_size - serving_config.bulk_queue_headroom)
+
+    async def submit(record):
+        adapter = prediction_pipeline.resolve_adapter(record.get("adapter"))
+        profile = prediction_pipeline.resolve_profile(record.get("profile"))
+        await ensure_adapter_fetched(adapter)
+
+        with IN_FLIGHT.track_inprogress():
+            # Wait for a slot instead of being rejected, which would count as a
+            # 429, but no longer than a request may take; nothing runs between
+            # the wait returning and submit() queueing the record
+            start = time.monotonic()
+            try:
+                await inference_executor.wait_for_capacity(bulk_queue_limit, serving_config.request_timeout)
+            finally:
+                BULK_QUEUE_WAIT.observe(time.monotonic() - start)
+            return await inference_executor.submit(record["text"], adapter, profile)
+
+    async def wait_for_disconnect():
+        while (await http_request.receive())["type"] != "http.disconnect":
+            pass
+
+    async def results():
+        records = iter_ndjson(http_request.stream(), serving_config.bulk_max_line_bytes)
+        count = errors = 0
+        try:
+            async for result in summarize_stream(records, submit, serving_config.bulk_max_in_flight, wait_for_disconnect):
+                count += 1
+                errors += "error" in result
+                yield json.dumps(result) + "\n"
+        except ClientDisconnect:
+            logger.warning(f"Bulk client disconnected after {count} results")
+        log_request("/predict/stream", "Bulk stream finished", records=count, errors=errors)
+
+    return BodyStreamingResponse(results(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
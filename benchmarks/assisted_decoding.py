@@ -0,0 +1,60 @@
+"""Decoding benchmark: greedy vs assisted (draft model) generation
+
+Summarizes the same dialogues with the `greedy` and `assisted` generation
+profiles, reports tokens/sec for each, checks that both produce identical
+summaries and prints the draft model's acceptance rate.
+
+Usage:
+    python benchmarks/assisted_decoding.py --samples 50
+"""
+import argparse
+import os
+import time
+import pandas as pd
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.pipeline.prediction import PredictionPipeline
+from textSummarizer.logging import logger
+
+
+def run(pipeline, texts, profile):
+    summaries, tokens = [], 0
+    start = time.perf_counter()
+    for text in texts:
+        summary = pipeline.predict(text, profile=profile)
+        summaries.append(summary)
+        tokens += len(pipeline.tokenizer(summary)["input_ids"])
+    elapsed = time.perf_counter() - start
+    return summaries, tokens / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--baseline", default="greedy", help="profile to compare against")
+    parser.add_argument("--assisted", default="assisted", help="profile using the draft model")
+    args = parser.parse_args()
+
+    data_dir = ConfigurationManager().config.data_ingestion.root_dir
+    texts = pd.read_csv(os.path.join(data_dir, "test.csv"))["dialogue"].dropna().tolist()[:args.samples]
+
+    pipeline = PredictionPipeline()
+    # Warm up both paths so loading the draft model is not timed
+    pipeline.predict(texts[0], profile=args.baseline)
+    pipeline.predict(texts[0], profile=args.assisted)
+    pipeline.draft_stats.update(proposed=0, accepted=0)
+
+    base_summaries, base_tps = run(pipeline, texts, args.baseline)
+    assisted_summaries, assisted_tps = run(pipeline, texts, args.assisted)
+
+    mismatches = sum(a != b for a, b in zip(base_summaries, assisted_summaries))
+    logger.info(f"{args.baseline}: {base_tps:.1f} tokens/sec")
+    logger.info(f"{args.assisted}: {assisted_tps:.1f} tokens/sec ({assisted_tps / base_tps:.2f}x)")
+    logger.info(f"Draft acceptance rate: {pipeline.draft_acceptance_rate:.1%}")
+    logger.info(f"Identical outputs: {len(texts) - mismatches}/{len(texts)}")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} summaries differ between {args.baseline} and {args.assisted}")
+
+
+if __name__ == "__main__":
+    main()
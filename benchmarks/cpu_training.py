@@ -0,0 +1,99 @@
+"""Short CPU training benchmark: fp32 eager baseline vs the CPU profile in params.yaml
+
+Runs a few optimizer steps on the same slice of the tokenized training set
+with each setup, reports time per step and checks that the losses stay within
+tolerance of the fp32 baseline.
+
+Usage:
+    python benchmarks/cpu_training.py --steps 10 --tolerance 0.05
+"""
+import argparse
+import time
+import torch
+from datasets import load_from_disk
+from transformers import AutoTokenizer, DataCollatorForSeq2Seq, set_seed
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.components.model_trainer import ModelTrainer
+from textSummarizer.logging import logger
+
+
+def run(trainer, batches, profile):
+    set_seed(trainer.config.seed)
+    model = trainer.build_model()
+    model.train()
+
+    # Dropout masks differ between micro batches and full batches, disable it so
+    # only numerics separate the two runs
+    for module in model.modules():
+        if isinstance(module, torch.nn.Dropout):
+            module.p = 0.0
+
+    bf16 = profile.get("bf16", False)
+    if profile.get("torch_compile", False):
+        model = torch.compile(model)
+
+    params = [p for p in model.parameters() if p.requires_grad]
+    fused = profile.get("optim", "").endswith("_fused")
+    optimizer = torch.optim.AdamW(params, lr=trainer.config.learning_rate, fused=fused or None)
+
+    accumulation_steps = profile["gradient_accumulation_steps"]
+    micro_batch_size = profile["per_device_train_batch_size"]
+
+    losses, timings = [], []
+    for batch in batches:
+        start = time.perf_counter()
+        step_loss = 0.0
+        for i in range(accumulation_steps):
+            micro_batch = {k: v[i * micro_batch_size:(i + 1) * micro_batch_size] for k, v in batch.items()}
+            with torch.autocast("cpu", dtype=torch.bfloat16, enabled=bf16):
+                loss = model(**micro_batch).loss / accumulation_steps
+            loss.backward()
+            step_loss += loss.item()
+        optimizer.step()
+        optimizer.zero_grad(set_to_none=True)
+        timings.append(time.perf_counter() - start)
+        losses.append(step_loss)
+
+    return losses, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="max mean relative loss difference to the fp32 baseline")
+    args = parser.parse_args()
+
+    config = ConfigurationManager().get_model_trainer_config()
+    trainer = ModelTrainer(config=config)
+    tokenizer = AutoTokenizer.from_pretrained(config.model_ckpt)
+
+    batch_size = config.per_device_train_batch_size
+    dataset = load_from_disk(config.data_path)["train"].select(range(args.steps * batch_size))
+    collator = DataCollatorForSeq2Seq(tokenizer)
+    batches = [
+        collator([dataset[j] for j in range(i, i + batch_size)])
+        for i in range(0, len(dataset), batch_size)
+    ]
+
+    baseline = {"per_device_train_batch_size": batch_size, "gradient_accumulation_steps": 1}
+    base_losses, base_times = run(trainer, batches, baseline)
+    profile = trainer.cpu_profile()
+    prof_losses, prof_times = run(trainer, batches, profile)
+
+    # Skip the first step: it pays for compilation and allocator warm-up
+    base_step = sum(base_times[1:]) / max(1, len(base_times) - 1)
+    prof_step = sum(prof_times[1:]) / max(1, len(prof_times) - 1)
+    drift = sum(abs(p - b) / b for p, b in zip(prof_losses, base_losses)) / len(base_losses)
+
+    logger.info(f"fp32 eager : {base_step:.3f}s/step, losses {[round(l, 4) for l in base_losses]}")
+    logger.info(f"CPU profile: {prof_step:.3f}s/step, losses {[round(l, 4) for l in prof_losses]}")
+    logger.info(f"Speedup {base_step / prof_step:.2f}x, mean relative loss drift {drift:.4f}")
+
+    if drift > args.tolerance:
+        raise SystemExit(f"Loss parity check failed: drift {drift:.4f} > {args.tolerance}")
+    logger.info("Loss parity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Input encoding benchmark: per-call tokenizer tensors vs the serving InputEncoder
+
+Encodes the same batches of dialogues with `tokenizer(..., padding=True)` and
+with the pipeline's InputEncoder (cold and cached), reports time per batch,
+and checks that both give the same padded inputs and generate identical ids.
+
+Usage:
+    python benchmarks/input_encoding.py --samples 64
+"""
+import argparse
+import os
+import time
+import torch
+import pandas as pd
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.pipeline.prediction import PredictionPipeline
+from textSummarizer.logging import logger
+
+
+def tokenizer_inputs(pipeline, texts):
+    return pipeline.tokenizer(
+        texts,
+        return_tensors="pt",
+        max_length=pipeline.max_input_tokens,
+        truncation=True,
+        padding=True,
+    ).to(pipeline.device)
+
+
+def encoder_inputs(pipeline, texts):
+    return pipeline.encoder.to_tensors(pipeline.encoder.encode(texts))
+
+
+def time_per_batch(fn, pipeline, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        fn(pipeline, batch)
+    return (time.perf_counter() - start) / len(batches)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=None, help="defaults to serving.max_batch_size")
+    args = parser.parse_args()
+
+    data_dir = ConfigurationManager().config.data_ingestion.root_dir
+    texts = pd.read_csv(os.path.join(data_dir, "test.csv"))["dialogue"].dropna().tolist()[:args.samples]
+
+    pipeline = PredictionPipeline()
+    batch_size = args.batch_size or pipeline.config.max_batch_size
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    tokenizer_time = time_per_batch(tokenizer_inputs, pipeline, batches)
+    cold_time = time_per_batch(encoder_inputs, pipeline, batches)
+    cached_time = time_per_batch(encoder_inputs, pipeline, batches)
+
+    settings = dict(pipeline.profiles[pipeline.default_profile])
+    settings.pop("assisted", None)
+    mismatches = 0
+    for batch in batches:
+        expected = tokenizer_inputs(pipeline, batch)
+        # Compare before generating, the encoder's tensors are reused buffers
+        inputs = {name: tensor.clone() for name, tensor in encoder_inputs(pipeline, batch).items()}
+        same_inputs = all(torch.equal(expected[name], inputs[name]) for name in inputs)
+        with torch.no_grad():
+            same_ids = torch.equal(
+                pipeline.model.generate(**expected, **settings),
+                pipeline.model.generate(**inputs, **settings),
+            )
+        mismatches += not (same_inputs and same_ids)
+
+    logger.info(f"tokenizer(padding=True): {tokenizer_time * 1000:.3f} ms/batch")
+    logger.info(f"InputEncoder, cold     : {cold_time * 1000:.3f} ms/batch")
+    logger.info(f"InputEncoder, cached   : {cached_time * 1000:.3f} ms/batch "
+                f"({tokenizer_time / cached_time:.1f}x)")
+    logger.info(f"Identical inputs and generated ids: {len(batches) - mismatches}/{len(batches)} batches")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} batches differ between the tokenizer and the InputEncoder")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,184 @@
 import os
+import json
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from textSummarizer.logging import logger
-from huggingface_hub import snapshot_download
+from huggingface_hub import HfApi, hf_hub_download
 from textSummarizer.entity import  DataIngestionConfig
 
+# Read files in large chunks, hashlib releases the GIL so threads hash in parallel
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
 class DataIngestion:
+    """Fetch the dataset into `root_dir` and keep it consistent with its source
+
+    A manifest records the size, SHA-256 and source version of every file.
+    On each run the local files are verified against it in parallel; the
+    source is only listed when a file is missing or corrupted, or when
+    `refresh` is set, and then only files that are missing, corrupted or
+    changed at the source are fetched again. The source is the Hugging Face
+    dataset repo, or a local mirror directory when `source_dir` is set.
+    """
+
     def __init__(self, config: DataIngestionConfig):
         self.config = config
 
-    def download_data(self):
-    # Create parent directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.config.root_dir), exist_ok=True)
-
-        if not os.path.exists(self.config.root_dir) or not os.listdir(self.config.root_dir):
-            logger.info("Starting data download...")
-            snapshot_download(
-                repo_id = self.config.repo_id,
-                repo_type = "dataset",
-                local_dir = self.config.root_dir,
-                local_dir_use_symlinks = self.config.local_dir_use_symlinks,
-            )
-            
-            logger.info(
-                f"Data downloaded successfully!"
-            )
+    def list_source_files(self) -> dict:
+        """Files at the source, by relative path
+
+        Returns:
+            dict: path -> {"size": bytes, "version": id that changes with the content,
+                "sha256": expected hash, for Hub files stored in LFS}
+        """
+        if self.config.source_dir:
+            files = {}
+            for dirpath, dirnames, filenames in os.walk(self.config.source_dir):
+                # Skip VCS and download caches
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    stat = os.stat(path)
+                    files[os.path.relpath(path, self.config.source_dir)] = {
+                        "size": stat.st_size,
+                        "version": str(stat.st_mtime_ns),
+                    }
+            return files
+
+        repo_files = HfApi().list_repo_tree(self.config.repo_id, repo_type="dataset", recursive=True)
+        files = {}
+        for f in repo_files:
+            if not hasattr(f, "blob_id"):
+                # A folder
+                continue
+            files[f.path] = {"size": f.size, "version": f.lfs.sha256 if f.lfs else f.blob_id}
+            if f.lfs:
+                files[f.path]["sha256"] = f.lfs.sha256
+        return files
+
+    def load_manifest(self) -> dict:
+        if not os.path.exists(self.config.manifest_file):
+            return {}
+        with open(self.config.manifest_file) as f:
+            return json.load(f)["files"]
+
+    def save_manifest(self, files: dict):
+        os.makedirs(os.path.dirname(self.config.manifest_file), exist_ok=True)
+        manifest = {
+            "source": str(self.config.source_dir or self.config.repo_id),
+            "files": dict(sorted(files.items())),
+        }
+        tmp_file = f"{self.config.manifest_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, self.config.manifest_file)
+
+    def _is_intact(self, path: str, entry: dict) -> bool:
+        local_path = os.path.join(self.config.root_dir, path)
+        try:
+            if os.path.getsize(local_path) != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return file_sha256(local_path) == entry["sha256"]
+
+    def verify(self, manifest: dict) -> list:
+        """Check local files against the manifest in parallel
+
+        Returns:
+            list: paths that are missing or whose size or hash do not match
+        """
+        paths = list(manifest)
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as pool:
+            intact = pool.map(lambda path: self._is_intact(path, manifest[path]), paths)
+            return [path for path, ok in zip(paths, intact) if not ok]
+
+    def fetch(self, path: str, source: dict) -> dict:
+        """Fetch one file from the source and describe it for the manifest
+
+        Raises:
+            IOError: if the fetched file does not have the size (or, where the
+                source publishes one, the SHA-256) listed at the source
+        """
+        local_path = os.path.join(self.config.root_dir, path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+        if self.config.source_dir:
+            # Copy next to the target and rename, so a crash never leaves a partial file
+            tmp_path = f"{local_path}.part"
+            shutil.copyfile(os.path.join(self.config.source_dir, path), tmp_path)
+            os.replace(tmp_path, local_path)
         else:
-            logger.info("Files already exists. Skipping download.")
+            # Only called for files that failed verification; without forcing,
+            # a local copy whose recorded metadata matches is returned as is
+            hf_hub_download(
+                repo_id=self.config.repo_id,
+                filename=path,
+                repo_type="dataset",
+                local_dir=self.config.root_dir,
+                force_download=True,
+            )
+
+        size = os.path.getsize(local_path)
+        if size != source["size"]:
+            raise IOError(f"Fetched {path} has {size} bytes, expected {source['size']}")
+        sha256 = file_sha256(local_path)
+        if source.get("sha256") and sha256 != source["sha256"]:
+            raise IOError(f"Fetched {path} has SHA-256 {sha256}, expected {source['sha256']}")
+        return {"size": size, "sha256": sha256}
+
+    def download_data(self):
+        os.makedirs(self.config.root_dir, exist_ok=True)
+
+        manifest = self.load_manifest()
+        intact = dict(manifest)
+        for path in self.verify(manifest):
+            logger.warning(f"{path} is missing or does not match the manifest")
+            del intact[path]
+
+        # Intact data needs no network, unless asked to look for changes
+        if manifest and len(intact) == len(manifest) and not self.config.refresh:
+            logger.info(f"All {len(manifest)} files verified against the manifest. Skipping download.")
+            return
+
+        # Intact files still at their manifest version are kept, everything else is fetched
+        source_files = self.list_source_files()
+        current = {
+            path: entry for path, entry in intact.items()
+            if path in source_files and entry.get("version") == source_files[path]["version"]
+        }
+        to_fetch = [path for path in source_files if path not in current]
+        if not to_fetch:
+            if current != manifest:
+                # Files removed at the source
+                self.save_manifest(current)
+            logger.info(f"All {len(source_files)} files are up to date with the source. Skipping download.")
+            return
+
+        logger.info(f"Fetching {len(to_fetch)} of {len(source_files)} files "
+                    f"from {self.config.source_dir or self.config.repo_id}")
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as pool:
+            futures = {pool.submit(self.fetch, path, source_files[path]): path for path in to_fetch}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    current[path] = {**future.result(), "version": source_files[path]["version"]}
+                except Exception as e:
+                    logger.error(f"Failed to fetch {path}: {e}")
+                    failed.append(path)
+
+        # Record what was fetched, so a re-run only retries the failures
+        self.save_manifest(current)
+        if failed:
+            raise IOError(f"Failed to fetch {len(failed)} files: {sorted(failed)}")
+        logger.info(f"Data downloaded successfully! Manifest saved to {self.config.manifest_file}")
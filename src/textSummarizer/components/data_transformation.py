@@ -3,6 +3,7 @@ from textSummarizer.logging import logger
 from transformers import AutoTokenizer
 from datasets import load_dataset, load_from_disk
 from textSummarizer.entity import DataTransformationConfig
+from textSummarizer.components.deduplication import NearDuplicateIndex
 
 class DataTransformation:
     def __init__(self, config: DataTransformationConfig):
@@ -72,6 +73,9 @@ class DataTransformation:
             # Fallback to trying load_dataset with HF id
             dataset_samsum = load_dataset(data_path)
 
+        if self.config.dedup_enabled:
+            dataset_samsum = NearDuplicateIndex(self.config).deduplicate(dataset_samsum)
+
         tokenized = dataset_samsum.map(
             self._preprocess,
             batched=True,
@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import zlib
+import multiprocessing
+import numpy as np
+from datasets import DatasetDict
+from textSummarizer.logging import logger
+from textSummarizer.entity import DataTransformationConfig
+
+# MinHash permutations are (a * x + b) mod p, truncated to 32 bits
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# When several splits hold the same dialogue, keep the copy in the first of these
+KEEP_PRIORITY = ("test", "validation")
+
+_NON_WORD = re.compile(r"\W+")
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    words = _NON_WORD.sub(" ", text.lower()).split()
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signatures(texts: list, a: np.ndarray, b: np.ndarray, shingle_size: int) -> np.ndarray:
+    """MinHash signatures of word shingles, one row of len(a) uint32 values per text"""
+    signatures = np.empty((len(texts), len(a)), dtype=np.uint32)
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(text or "", shingle_size)
+        # Overflow wraps around, which is fine for hashing
+        permuted = (a[:, None] * hashes[None, :] + b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        signatures[i] = permuted.min(axis=1)
+    return signatures
+
+
+def _signature_job(args):
+    return minhash_signatures(*args)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of near-duplicate dialogues within and across splits
+
+    Signatures live in a memory-mapped file and candidate pairs are found one
+    LSH band at a time by sorting band hashes, so memory stays bounded by a
+    few arrays of one integer per row. Candidates whose signatures agree on at
+    least `dedup_threshold` of their values (the estimated Jaccard similarity
+    of their word shingles) are merged into clusters.
+    """
+
+    def __init__(self, config: DataTransformationConfig):
+        self.config = config
+        if config.dedup_num_perm % config.dedup_bands:
+            raise ValueError(f"dedup_num_perm ({config.dedup_num_perm}) must be a multiple "
+                             f"of dedup_bands ({config.dedup_bands})")
+        self.rows_per_band = config.dedup_num_perm // config.dedup_bands
+
+        rng = np.random.RandomState(config.dedup_seed)
+        self.a = rng.randint(1, np.iinfo(np.int64).max, size=config.dedup_num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, np.iinfo(np.int64).max, size=config.dedup_num_perm, dtype=np.int64).astype(np.uint64)
+
+    def _compute_signatures(self, dataset: DatasetDict, path: str) -> np.memmap:
+        total = sum(len(split) for split in dataset.values())
+        signatures = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint32,
+                                               shape=(total, self.config.dedup_num_perm))
+        batch_size = self.config.dedup_batch_size
+        num_proc = max(1, self.config.dedup_num_proc)
+
+        def batches():
+            for split in dataset.values():
+                for batch in split.iter(batch_size=batch_size):
+                    yield batch["dialogue"]
+
+        row = 0
+        with multiprocessing.Pool(num_proc) as pool:
+            wave = []
+            for texts in batches():
+                wave.append((texts, self.a, self.b, self.config.dedup_shingle_size))
+                # Hand out one batch per worker at a time so only a few are in memory
+                if len(wave) == num_proc:
+                    for block in pool.map(_signature_job, wave):
+                        signatures[row:row + len(block)] = block
+                        row += len(block)
+                    wave = []
+            for block in pool.map(_signature_job, wave):
+                signatures[row:row + len(block)] = block
+                row += len(block)
+
+        signatures.flush()
+        return signatures
+
+    def _candidate_pairs(self, signatures: np.ndarray, band: int):
+        """Rows sharing this band's hash, each paired with the first row of its bucket"""
+        start = band * self.rows_per_band
+        keys = np.zeros(len(signatures), dtype=np.uint64)
+        for offset in range(0, len(signatures), self.config.dedup_batch_size):
+            block = signatures[offset:offset + self.config.dedup_batch_size, start:start + self.rows_per_band]
+            key = np.zeros(len(block), dtype=np.uint64)
+            for column in block.T.astype(np.uint64):
+                key = key * np.uint64(1000003) ^ column
+            keys[offset:offset + len(block)] = key
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        new_bucket = np.ones(len(order), dtype=bool)
+        new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        bucket_start = np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))
+        repeated = ~new_bucket
+        return order[bucket_start[repeated]], order[repeated]
+
+    @staticmethod
+    def _find(parent: np.ndarray, i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def cluster(self, signatures: np.ndarray) -> np.ndarray:
+        """Cluster id (a member row) of every row; rows without near-duplicates are their own cluster"""
+        parent = np.arange(len(signatures), dtype=np.int64)
+        for band in range(self.config.dedup_bands):
+            firsts, others = self._candidate_pairs(signatures, band)
+            for offset in range(0, len(firsts), self.config.dedup_batch_size):
+                a = firsts[offset:offset + self.config.dedup_batch_size]
+                b = others[offset:offset + self.config.dedup_batch_size]
+                match = (signatures[a] == signatures[b]).mean(axis=1) >= self.config.dedup_threshold
+                for i, j in zip(a[match], b[match]):
+                    root_i, root_j = self._find(parent, i), self._find(parent, j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        # Point every row straight at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent
+            parent = grandparent
+
+    def deduplicate(self, dataset: DatasetDict) -> DatasetDict:
+        """Find near-duplicates, write the report and, if configured, drop them
+
+        Every cluster keeps one row, preferring the test split, then
+        validation, then the earliest row; the other copies are dropped.
+
+        Returns:
+            DatasetDict: the dataset, without duplicates if `dedup_drop` is set
+        """
+        signature_file = os.path.join(self.config.root_dir, "minhash_signatures.npy")
+        logger.info(f"Computing MinHash signatures for {sum(len(s) for s in dataset.values())} dialogues")
+        signatures = self._compute_signatures(dataset, signature_file)
+        try:
+            roots = self.cluster(signatures)
+        finally:
+            del signatures
+            os.remove(signature_file)
+
+        bounds, offset = {}, 0
+        for name, split in dataset.items():
+            bounds[name] = (offset, offset + len(split))
+            offset += len(split)
+        split_roots = {name: roots[start:end] for name, (start, end) in bounds.items()}
+
+        # Keep the first row of every cluster in priority order
+        priority = [s for s in KEEP_PRIORITY if s in dataset] + [s for s in dataset if s not in KEEP_PRIORITY]
+        seen = np.zeros(0, dtype=np.int64)
+        keep = {}
+        for name in priority:
+            unique_roots, first_rows = np.unique(split_roots[name], return_index=True)
+            new = ~np.isin(unique_roots, seen)
+            keep[name] = np.sort(first_rows[new])
+            seen = np.union1d(seen, unique_roots)
+
+        cluster_ids, cluster_sizes = np.unique(roots, return_counts=True)
+        report = {
+            "rows": {name: len(split) for name, split in dataset.items()},
+            "threshold": self.config.dedup_threshold,
+            "duplicate_clusters": int((cluster_sizes > 1).sum()),
+            "duplicate_rows": {
+                name: int(len(r) - len(np.unique(r))) for name, r in split_roots.items()
+            },
+            # Rows of one split with a near-duplicate in another (train/test is leakage)
+            "cross_split": {
+                f"{name}/{other}": int(np.isin(split_roots[name], split_roots[other]).sum())
+                for name in dataset for other in dataset if name != other
+            },
+            "dropped": {
+                name: (len(split) - len(keep[name])) if self.config.dedup_drop else 0
+                for name, split in dataset.items()
+            },
+            "examples": self._examples(dataset, roots, bounds, cluster_ids[cluster_sizes > 1][:10]),
+        }
+
+        with open(self.config.dedup_report_file, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Found {report['duplicate_clusters']} near-duplicate clusters, "
+                    f"cross-split matches {report['cross_split']}, report saved to {self.config.dedup_report_file}")
+
+        if not self.config.dedup_drop:
+            return dataset
+        return DatasetDict({name: split.select(keep[name]) for name, split in dataset.items()})
+
+    @staticmethod
+    def _examples(dataset, roots, bounds, cluster_ids):
+        examples = []
+        for cluster_id in cluster_ids:
+            members = []
+            for row in np.flatnonzero(roots == cluster_id):
+                name = next(n for n, (start, end) in bounds.items() if start <= row < end)
+                index = int(row - bounds[name][0])
+                members.append({"split": name, "row": index, "dialogue": dataset[name][index]["dialogue"][:200]})
+            examples.append(members)
+        return examples
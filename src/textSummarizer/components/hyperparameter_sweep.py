@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import random
+import itertools
+import multiprocessing
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+from transformers import TrainerCallback
+from textSummarizer.entity import ModelTrainerConfig, SweepConfig
+from textSummarizer.logging import logger
+from textSummarizer.utils.performance import partition_cores
+
+EVALS_FILE = "evals.jsonl"
+RESULT_FILE = "result.json"
+
+
+class MedianPruningCallback(TrainerCallback):
+    """Stop a trial whose eval loss is worse than the median of the other trials at the same step
+
+    Every evaluation is appended to the trial's own evals file; the other
+    trials' files in the sweep directory are read to find the median. Pruning
+    starts after `prune_after_evals` evaluations and once at least
+    `min_trials_to_prune` other trials have reported the same step.
+    """
+
+    def __init__(self, sweep_dir: str, trial_dir: str, prune_after_evals: int, min_trials_to_prune: int):
+        self.sweep_dir = sweep_dir
+        self.evals_file = os.path.join(trial_dir, EVALS_FILE)
+        self.prune_after_evals = prune_after_evals
+        self.min_trials_to_prune = min_trials_to_prune
+        self.evaluations = 0
+        self.pruned = False
+
+    def _other_losses(self, step: int) -> list:
+        losses = []
+        for name in os.listdir(self.sweep_dir):
+            path = os.path.join(self.sweep_dir, name, EVALS_FILE)
+            if path == self.evals_file or not os.path.exists(path):
+                continue
+            with open(path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["step"] == step:
+                        losses.append(record["eval_loss"])
+                        break
+        return losses
+
+    def on_evaluate(self, args, state, control, metrics=None, **kwargs):
+        if not metrics or "eval_loss" not in metrics:
+            return
+        loss, step = metrics["eval_loss"], state.global_step
+        with open(self.evals_file, "a") as f:
+            f.write(json.dumps({"step": step, "eval_loss": loss}) + "\n")
+
+        self.evaluations += 1
+        if self.evaluations < self.prune_after_evals:
+            return
+        others = self._other_losses(step)
+        if len(others) >= self.min_trials_to_prune and loss > np.median(others):
+            logger.info(f"Pruning trial at step {step}: eval_loss {loss:.4f} > median {np.median(others):.4f}")
+            self.pruned = True
+            control.should_training_stop = True
+
+
+def run_trial(trial: dict, trainer_config: ModelTrainerConfig, sweep_config: SweepConfig, sweep_dir: str, slot: int):
+    """Train one trial in this (child) process on its share of the cores"""
+    # Imported here so the parent process never loads the model stack
+    from textSummarizer.components.model_trainer import ModelTrainer
+
+    trial_dir = os.path.join(sweep_dir, trial["trial_id"])
+    os.makedirs(trial_dir, exist_ok=True)
+    cores = partition_cores(slot, sweep_config.parallel_trials)
+
+    # num_threads=0 sizes the thread pool to the cores this process is pinned
+    # to; data-loader workers beyond those would only compete with training
+    config = replace(
+        trainer_config,
+        root_dir=trial_dir,
+        num_threads=0,
+        nproc_per_node=1,
+        dataloader_num_workers=min(trainer_config.dataloader_num_workers, len(cores) // 2),
+        **trial["params"],
+    )
+    pruning = MedianPruningCallback(
+        sweep_dir, trial_dir, sweep_config.prune_after_evals, sweep_config.min_trials_to_prune
+    )
+
+    result = {"trial_id": trial["trial_id"], **trial["params"]}
+    start = time.time()
+    try:
+        trainer = ModelTrainer(config=config).train(callbacks=[pruning])
+        evals = [entry for entry in trainer.state.log_history if "eval_loss" in entry]
+        result.update(evals[-1] if evals else {})
+        result["status"] = "pruned" if pruning.pruned else "completed"
+    except Exception as e:
+        logger.exception(e)
+        result.update(status="failed", error=str(e))
+    result["duration_s"] = round(time.time() - start, 1)
+    result["output_dir"] = trial_dir
+
+    with open(os.path.join(trial_dir, RESULT_FILE), "w") as f:
+        json.dump(result, f, indent=2)
+
+
+class HyperparameterSweep:
+    """Run ModelTrainer trials in parallel processes and rank them in a leaderboard
+
+    Each of the `parallel_trials` slots is pinned to its own slice of the
+    cores. All trials read the same tokenized dataset, which `load_from_disk`
+    memory-maps, so the OS page cache holds a single copy. Trials losing
+    to the median of the others on eval loss are stopped early.
+    """
+
+    def __init__(self, config: SweepConfig, trainer_config: ModelTrainerConfig):
+        self.config = config
+        self.trainer_config = trainer_config
+
+    def trials(self) -> list:
+        """Every combination of the search space, or a random sample of `max_trials` of them"""
+        names = list(self.config.search_space)
+        grid = [dict(zip(names, values)) for values in itertools.product(*self.config.search_space.values())]
+        if self.config.max_trials and self.config.max_trials < len(grid):
+            grid = random.Random(self.config.seed).sample(grid, self.config.max_trials)
+        return [{"trial_id": f"trial-{i:03d}", "params": params} for i, params in enumerate(grid)]
+
+    def run(self) -> pd.DataFrame:
+        """Run all trials and write the leaderboard
+
+        Returns:
+            pd.DataFrame: one row per trial, best first
+        """
+        trials = self.trials()
+        # A directory per sweep, so pruning never compares against older runs
+        self.sweep_dir = os.path.join(self.config.root_dir, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.sweep_dir, exist_ok=True)
+        logger.info(f"Running {len(trials)} trials, {self.config.parallel_trials} at a time, "
+                    f"on dataset {self.trainer_config.data_path}, results in {self.sweep_dir}")
+
+        # spawn: a fresh interpreter per trial, nothing inherited from this process
+        context = multiprocessing.get_context("spawn")
+        pending = list(trials)
+        running = {}
+        while pending or running:
+            free_slots = [s for s in range(self.config.parallel_trials) if s not in running]
+            while pending and free_slots:
+                trial, slot = pending.pop(0), free_slots.pop(0)
+                process = context.Process(
+                    target=run_trial,
+                    args=(trial, self.trainer_config, self.config, self.sweep_dir, slot),
+                    name=trial["trial_id"],
+                )
+                process.start()
+                running[slot] = process
+                logger.info(f"Started {trial['trial_id']} on slot {slot}: {trial['params']}")
+
+            time.sleep(1)
+            for slot, process in list(running.items()):
+                if not process.is_alive():
+                    process.join()
+                    logger.info(f"{process.name} finished with exit code {process.exitcode}")
+                    del running[slot]
+
+        return self.write_leaderboard(trials)
+
+    def write_leaderboard(self, trials: list) -> pd.DataFrame:
+        results = []
+        for trial in trials:
+            path = os.path.join(self.sweep_dir, trial["trial_id"], RESULT_FILE)
+            if os.path.exists(path):
+                with open(path) as f:
+                    results.append(json.load(f))
+            else:
+                # The trial process died before writing its result
+                results.append({"trial_id": trial["trial_id"], **trial["params"], "status": "failed"})
+
+        leaderboard = pd.DataFrame(results)
+        if self.config.rank_by in leaderboard:
+            leaderboard = leaderboard.sort_values(
+                self.config.rank_by, ascending=not self.config.greater_is_better, na_position="last"
+            )
+        leaderboard_file = os.path.join(self.sweep_dir, "leaderboard.csv")
+        leaderboard.to_csv(leaderboard_file, index=False)
+        logger.info(f"Leaderboard saved to {leaderboard_file}:\n{leaderboard.head(10).to_string(index=False)}")
+        return leaderboard
@@ -1,4 +1,3 @@
-import os
 import numpy as np
 import torch
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, DataCollatorForSeq2Seq
@@ -8,7 +7,6 @@ import evaluate
 import pandas as pd
 from tqdm import tqdm
 from textSummarizer.logging import logger
-from dotenv import load_dotenv
 from textSummarizer.entity import ModelEvaluationConfig
 
 class ModelEvaluation:
@@ -17,20 +15,18 @@ class ModelEvaluation:
 
     def evaluate(self):
         device = "cuda" if torch.cuda.is_available() else "cpu"
-        load_dotenv()
-        username = os.getenv('HUGGINGFACE_USERNAME')
-        repo_id = f"{username}/distilbart-samsum-lora"
-        # Load LoRA model from Hugging Face
+        # Local adapter directory or Hugging Face repo id
+        repo_id = self.config.adapter_path
         logger.info(f"Loading LoRA model from {repo_id}")
         
         base_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.base_model_path)
         base_model.config.use_cache = True
         
-        # Load LoRA adapter from Hugging Face
+        # Load LoRA adapter
         model = PeftModel.from_pretrained(base_model, repo_id)
         model = model.to(device)
         
-        # Load tokenizer from Hugging Face (from LoRA repo)
+        # Load tokenizer saved with the LoRA adapter
         tokenizer = AutoTokenizer.from_pretrained(repo_id)
         
         # Load test dataset
@@ -9,6 +9,7 @@ from transformers import (
     DataCollatorForSeq2Seq,
     Seq2SeqTrainer,
     Seq2SeqTrainingArguments,
+    set_seed,
 )
 from peft import LoraConfig, get_peft_model, TaskType, PeftModel
 import evaluate
@@ -17,16 +18,34 @@ from huggingface_hub import login
 import os
 from huggingface_hub import HfApi
 from textSummarizer.entity import ModelTrainerConfig
+from textSummarizer.logging import logger
+from textSummarizer.utils.performance import (
+    configure_torch_threads,
+    cpu_supports_bf16,
+    fused_optimizer_supported,
+    partition_cores,
+)
 
 class ModelTrainer:
     def __init__(self, config: ModelTrainerConfig):
         self.config = config
         
-        # Set seeds for reproducibility
-        torch.manual_seed(config.seed)
-        np.random.seed(config.seed)
+        # Set by torchrun when training data-parallel across local processes
+        self.rank = int(os.environ.get("RANK", 0))
+        self.local_rank = int(os.environ.get("LOCAL_RANK", 0))
+        self.world_size = int(os.environ.get("WORLD_SIZE", 1))
+        
+        # Set seeds for reproducibility. Every rank uses the same seed so the
+        # LoRA weights start identical; the same seed goes into the training
+        # arguments so the (distributed) sampler shuffles the same way
+        # everywhere, and train() offsets the dropout stream per rank.
+        set_seed(config.seed)
 
     def _hf_save_model(self, model, tokenizer):
+        # Only one process may push when training data-parallel
+        if self.rank != 0:
+            return
+
         load_dotenv()
         token = os.getenv('HUGGINGFACE_HUB_TOKEN')
         username = os.getenv('HUGGINGFACE_USERNAME')
@@ -45,23 +64,13 @@ class ModelTrainer:
             print(f"Model pushed to https://huggingface.co/{repo_id}")
 
 
-    def train(self):
-        # Device setup
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        # Load tokenizer and model
-        tokenizer = AutoTokenizer.from_pretrained(self.config.model_ckpt)
+    def build_model(self):
+        """Load the base checkpoint and wrap it with the LoRA adapter"""
         model = AutoModelForSeq2SeqLM.from_pretrained(self.config.model_ckpt)
         
         # Recommended when training with adapters
         model.config.use_cache = False
         
-        # Load pre-tokenized dataset
-        dataset_samsum_pt = load_from_disk(self.config.data_path)
-        
-        # Data collator
-        seq2seq_data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
-        
         # Setup PEFT (LoRA)
         lora_config = LoraConfig(
             r=self.config.lora_r,
@@ -75,11 +84,102 @@ class ModelTrainer:
         # Wrap model with LoRA
         model = get_peft_model(model, lora_config)
         model.print_trainable_parameters()
+        return model
+
+    def cpu_profile(self) -> dict:
+        """Training arguments for CPU runs
+        
+        Enables bf16 autocast when the CPU supports it natively, optional
+        torch.compile, the fused AdamW kernel and data-loader workers. The
+        configured batch size is split into micro batches with gradient
+        accumulation so the effective batch size stays the same.
+        """
+        batch_size = self.config.per_device_train_batch_size
+        if torch.cuda.is_available() or not self.config.cpu_profile_enabled:
+            return {
+                "per_device_train_batch_size": batch_size,
+                "gradient_accumulation_steps": 1,
+            }
+
+        # Data-parallel ranks set their threads when train() pins them to their cores
+        if self.world_size == 1:
+            configure_torch_threads(self.config.num_threads)
+
+        bf16 = self.config.cpu_bf16 and cpu_supports_bf16()
+        if self.config.cpu_bf16 and not bf16:
+            logger.warning("CPU has no native bf16 support, training in fp32")
+
+        optim = self.config.optim
+        if optim.endswith("_fused") and not fused_optimizer_supported():
+            logger.warning(f"{optim} needs torch>=2.4, falling back to adamw_torch")
+            optim = "adamw_torch"
+
+        # Largest micro batch that divides the batch, so accumulating it keeps the
+        # effective batch size (and every row of each batch) exactly
+        requested = min(self.config.micro_batch_size, batch_size)
+        micro_batch_size = next(size for size in range(requested, 0, -1) if batch_size % size == 0)
+        if micro_batch_size != requested:
+            logger.warning(f"micro_batch_size {self.config.micro_batch_size} does not divide "
+                           f"per_device_train_batch_size {batch_size}, using {micro_batch_size}")
+        accumulation_steps = batch_size // micro_batch_size
+        logger.info(
+            f"CPU profile: bf16={bf16}, torch_compile={self.config.torch_compile}, "
+            f"optim={optim}, micro_batch_size={micro_batch_size}, "
+            f"gradient_accumulation_steps={accumulation_steps} "
+            f"(effective batch size {micro_batch_size * accumulation_steps})"
+        )
+
+        return {
+            "per_device_train_batch_size": micro_batch_size,
+            "gradient_accumulation_steps": accumulation_steps,
+            "use_cpu": True,
+            "bf16": bf16,
+            "torch_compile": self.config.torch_compile,
+            "optim": optim,
+            "dataloader_num_workers": self.config.dataloader_num_workers,
+            "dataloader_persistent_workers": self.config.dataloader_num_workers > 0,
+        }
+
+    def train(self, callbacks: list = None):
+        """Fine-tune the LoRA adapter and save it to root_dir
+
+        Args:
+            callbacks (list, optional): extra TrainerCallbacks, e.g. for pruning sweep trials
+
+        Returns:
+            Seq2SeqTrainer: the trainer, with the training and eval history in its state
+        """
+        # Device setup
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        if self.world_size > 1:
+            # Give each local rank its own cores instead of oversubscribing, with
+            # at most one thread per core (0 still means one per physical core)
+            cores = partition_cores(self.local_rank, self.world_size)
+            configure_torch_threads(min(self.config.num_threads or 0, len(cores)))
+        
+        # Load tokenizer and model
+        tokenizer = AutoTokenizer.from_pretrained(self.config.model_ckpt)
+        model = self.build_model()
+        
+        # Load pre-tokenized dataset
+        dataset_samsum_pt = load_from_disk(self.config.data_path)
+        
+        # Data collator
+        seq2seq_data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
+        
+        # CPU performance profile (no-op on CUDA)
+        cpu_profile = self.cpu_profile()
+        
+        # Data-parallel across local processes (launched by stage 4 through torchrun)
+        if self.world_size > 1:
+            logger.info(f"Rank {self.rank}/{self.world_size} using the {self.config.ddp_backend} backend")
+            cpu_profile["ddp_backend"] = self.config.ddp_backend
+            cpu_profile["ddp_find_unused_parameters"] = False
         
         # Training arguments using Seq2SeqTrainingArguments
         training_args = Seq2SeqTrainingArguments(
             output_dir=self.config.root_dir,
-            per_device_train_batch_size=self.config.per_device_train_batch_size,
             per_device_eval_batch_size=self.config.per_device_eval_batch_size,
             predict_with_generate=True,
             eval_strategy=self.config.eval_strategy,
@@ -91,9 +191,14 @@ class ModelTrainer:
             weight_decay=self.config.weight_decay,
             num_train_epochs=self.config.num_train_epochs,
             fp16=torch.cuda.is_available(),
+            dataloader_pin_memory=torch.cuda.is_available(),
             remove_unused_columns=True,
             push_to_hub=False,
             report_to="none",
+            # The Trainer reseeds and seeds its sampler from these, not from set_seed()
+            seed=self.config.seed,
+            data_seed=self.config.seed,
+            **cpu_profile,
         )
         
         # ROUGE metric for evaluation
@@ -131,15 +236,23 @@ class ModelTrainer:
             eval_dataset=eval_dataset,
             processing_class=tokenizer,
             data_collator=seq2seq_data_collator,
-            compute_metrics=compute_metrics
+            compute_metrics=compute_metrics,
+            callbacks=callbacks,
         )
         
+        # Distinct but reproducible dropout masks per rank
+        torch.manual_seed(self.config.seed + self.rank)
+        
         # Train
         trainer.train()
         
+        if not trainer.is_world_process_zero():
+            return trainer
+        
         # Save the LoRA adapter and tokenizer
         os.makedirs(self.config.root_dir, exist_ok=True)
         model.save_pretrained(self.config.root_dir)
         tokenizer.save_pretrained(self.config.root_dir)
         print(f"Saved LoRA adapter and tokenizer to {self.config.root_dir}")
+        return trainer
     
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import platform
+import itertools
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import torch
+import yaml
+import evaluate
+from textSummarizer.logging import logger
+from textSummarizer.entity import AutotuneConfig, ServingConfig
+from textSummarizer.pipeline.prediction import PredictionPipeline
+from textSummarizer.utils.performance import configure_torch_threads
+
+# Name under which the settings being measured are registered on the pipeline
+CANDIDATE_PROFILE = "autotune"
+
+
+class ServingAutotuner:
+    """Measure serving settings on this machine and keep a Pareto-optimal one
+
+    Every combination of intra-op threads, batch size, beam count and maximum
+    summary length in the search space is run over the same sample of
+    requests and scored on throughput, p95 latency and ROUGE-L drop against
+    the default generation profile. Among the settings within the allowed
+    drop, the best non-dominated one on the configured objective is written to
+    the tuned profile file the server loads at startup.
+    """
+
+    def __init__(self, config: AutotuneConfig, serving_config: ServingConfig):
+        self.config = config
+        self.serving_config = serving_config
+        self.rouge = evaluate.load("rouge")
+
+    def load_samples(self):
+        """Sample request texts, with reference summaries when every sample has one
+
+        Returns:
+            tuple: (texts, references or None)
+        """
+        if self.config.sample_file:
+            logger.info(f"Loading request samples from {self.config.sample_file}")
+            with open(self.config.sample_file) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            df = pd.DataFrame(records).rename(columns={"text": "dialogue"})
+        else:
+            logger.info(f"Sampling requests from {self.config.test_data_path}")
+            df = pd.read_csv(self.config.test_data_path)
+
+        df = df.dropna(subset=["dialogue"])
+        df = df.sample(n=min(self.config.num_samples, len(df)), random_state=0)
+        texts = df["dialogue"].tolist()
+        has_references = "summary" in df and df["summary"].notna().all()
+        return texts, df["summary"].tolist() if has_references else None
+
+    def candidates(self):
+        """Serving settings to measure, generation settings derived from the default profile"""
+        base = dict(self.serving_config.generation_profiles[self.serving_config.default_generation_profile])
+        base.pop("assisted", None)
+
+        for num_threads, max_batch_size, num_beams, max_length in itertools.product(
+            self.config.num_threads, self.config.max_batch_size, self.config.num_beams, self.config.max_length
+        ):
+            generation = {**base, "num_beams": num_beams, "max_length": max_length}
+            if num_beams == 1:
+                # Only meaningful for beam search
+                generation.pop("early_stopping", None)
+                generation.pop("length_penalty", None)
+            yield {"num_threads": num_threads, "max_batch_size": max_batch_size, "generation": generation}
+
+    @staticmethod
+    def measure(pipeline: PredictionPipeline, texts: list, max_batch_size: int, profile: str):
+        """Summarize `texts` in batches of `max_batch_size`
+
+        A request's latency is the duration of the batch that served it.
+
+        Returns:
+            tuple: (summaries, throughput in requests/sec, p95 latency in seconds)
+        """
+        # Untimed, so one-off allocations of a new batch shape are not measured
+        pipeline.predict_batch(texts[:max_batch_size], profile=profile)
+
+        summaries, latencies = [], []
+        start = time.perf_counter()
+        for i in range(0, len(texts), max_batch_size):
+            batch = texts[i:i + max_batch_size]
+            batch_start = time.perf_counter()
+            summaries.extend(pipeline.predict_batch(batch, profile=profile))
+            latencies.extend([time.perf_counter() - batch_start] * len(batch))
+        elapsed = time.perf_counter() - start
+
+        return summaries, len(texts) / elapsed, float(np.percentile(latencies, 95))
+
+    def rouge_l(self, predictions, references):
+        scores = self.rouge.compute(predictions=predictions, references=references, use_stemmer=True)
+        return round(scores["rougeL"] * 100, 4)
+
+    @staticmethod
+    def pareto_front(results: pd.DataFrame) -> pd.Series:
+        """Mask of the results no other result beats on throughput, p95 latency and ROUGE-L drop at once"""
+        # Negate throughput so that lower is better for every objective
+        costs = results[["throughput", "p95_latency", "rouge_drop"]].to_numpy() * np.array([-1, 1, 1])
+        dominated = [((costs <= cost).all(axis=1) & (costs < cost).any(axis=1)).any() for cost in costs]
+        return pd.Series(np.logical_not(dominated), index=results.index)
+
+    def tune(self) -> dict:
+        """Run the sweep, write the report and the tuned serving profile
+
+        Raises:
+            ValueError: if no setting stays within `max_rouge_drop`
+
+        Returns:
+            dict: the tuned serving profile
+        """
+        texts, references = self.load_samples()
+        # Every setting re-encodes the same samples; with the encoding cache on,
+        # all but the first would skip tokenization and preselection
+        pipeline = PredictionPipeline(replace(self.serving_config, encoding_cache_size=0))
+        default_profile = self.serving_config.default_generation_profile
+
+        # Reference point for ROUGE drift; without reference summaries the
+        # default profile's own output is the reference
+        # Same threads as the server: num_threads null leaves torch's default,
+        # which is still in effect as no candidate has run yet
+        if self.serving_config.num_threads is not None:
+            configure_torch_threads(self.serving_config.num_threads)
+        baseline, baseline_throughput, baseline_p95 = self.measure(
+            pipeline, texts, self.serving_config.max_batch_size, default_profile
+        )
+        references = references or baseline
+        baseline_rouge = self.rouge_l(baseline, references)
+        logger.info(f"Baseline ({default_profile}): {baseline_throughput:.2f} req/s, "
+                    f"p95 {baseline_p95:.3f}s, rougeL {baseline_rouge}")
+
+        candidates = list(self.candidates())
+        rows = []
+        for i, candidate in enumerate(candidates, start=1):
+            generation = candidate["generation"]
+            configure_torch_threads(candidate["num_threads"])
+            pipeline.profiles[CANDIDATE_PROFILE] = generation
+
+            summaries, throughput, p95 = self.measure(pipeline, texts, candidate["max_batch_size"], CANDIDATE_PROFILE)
+            rouge = self.rouge_l(summaries, references)
+            rows.append({
+                "num_threads": candidate["num_threads"],
+                "max_batch_size": candidate["max_batch_size"],
+                "num_beams": generation["num_beams"],
+                "max_length": generation["max_length"],
+                "throughput": round(throughput, 4),
+                "p95_latency": round(p95, 4),
+                "rougeL": rouge,
+                "rouge_drop": round(baseline_rouge - rouge, 4),
+            })
+            logger.info(f"[{i}/{len(candidates)}] {rows[-1]}")
+
+        results = pd.DataFrame(rows)
+        acceptable = results["rouge_drop"] <= self.config.max_rouge_drop
+        results["pareto"] = False
+        if acceptable.any():
+            results.loc[acceptable, "pareto"] = self.pareto_front(results[acceptable])
+        front = results[results["pareto"]]
+
+        results["selected"] = False
+        if not front.empty:
+            if self.config.objective == "latency":
+                best = front["p95_latency"].idxmin()
+            else:
+                best = front["throughput"].idxmax()
+            results.loc[best, "selected"] = True
+
+        results.to_csv(self.config.report_file, index=False)
+        logger.info(f"Autotune results saved to {self.config.report_file}")
+
+        if front.empty:
+            raise ValueError(f"No setting stays within {self.config.max_rouge_drop} rougeL of the "
+                             f"{default_profile} profile, see {self.config.report_file}")
+
+        chosen, row = candidates[best], results.loc[best]
+        profile = {
+            "num_threads": chosen["num_threads"],
+            "max_batch_size": chosen["max_batch_size"],
+            "generation": chosen["generation"],
+            "measured": {
+                "throughput": float(row["throughput"]),
+                "p95_latency": float(row["p95_latency"]),
+                "rougeL": float(row["rougeL"]),
+                "rouge_drop": float(row["rouge_drop"]),
+                "baseline_throughput": round(baseline_throughput, 4),
+                "baseline_p95_latency": round(baseline_p95, 4),
+            },
+            "host": {
+                "cpus": len(os.sched_getaffinity(0)),
+                "processor": platform.processor() or platform.machine(),
+                "torch": str(torch.__version__),
+            },
+            "samples": len(texts),
+            "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+        os.makedirs(os.path.dirname(self.config.profile_file), exist_ok=True)
+        with open(self.config.profile_file, "w") as f:
+            yaml.safe_dump(profile, f, sort_keys=False)
+        logger.info(f"Tuned serving profile saved to {self.config.profile_file}: "
+                    f"{len(front)} Pareto-optimal settings, selected {row.to_dict()}")
+
+        return profile
@@ -1,11 +1,15 @@
 import os
 from textSummarizer.constant import *
 from textSummarizer.utils.common import read_yaml, create_directories
+from textSummarizer.logging import logger
 from pathlib import Path
+from dotenv import load_dotenv
 from textSummarizer.entity import (DataIngestionConfig,
                                    DataValidationConfig,
                                    DataTransformationConfig, ModelEvaluationConfig,
-                                   ModelTrainerConfig)
+                                   ModelTrainerConfig, SweepConfig, ServingConfig,
+                                   TrainingJobConfig, AutotuneConfig,
+                                   LoggingConfig)
 
 class ConfigurationManager:
     def __init__(
@@ -16,15 +20,18 @@ class ConfigurationManager:
         self.config = read_yaml(config_filepath)
         self.params = read_yaml(params_filepath)
 
-        create_directories([self.config.artifacts_root])
-
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         config = self.config.data_ingestion
 
+        create_directories([self.config.artifacts_root])
+
         data_ingestion_config = DataIngestionConfig(
             root_dir = Path(config.root_dir),
             repo_id = config.repo_id,
-            local_dir_use_symlinks = config.local_dir_use_symlinks,
+            source_dir = Path(config.source_dir) if config.source_dir else None,
+            manifest_file = Path(config.manifest_file),
+            max_workers = config.max_workers,
+            refresh = config.refresh,
         )
 
         return data_ingestion_config
@@ -45,12 +52,23 @@ class ConfigurationManager:
     
     def get_data_transformation_config(self) -> DataTransformationConfig:
         config = self.config.data_transformation
+        dedup_params = self.params.Deduplication
 
         create_directories([config.root_dir])
         data_transformation_config = DataTransformationConfig(
             root_dir=Path(config.root_dir),
             data_path=Path(config.data_path),
             tokenizer_path=Path(config.tokenizer_path),
+            dedup_report_file=Path(config.dedup_report_file),
+            dedup_enabled=dedup_params.enabled,
+            dedup_drop=dedup_params.drop,
+            dedup_threshold=dedup_params.threshold,
+            dedup_num_perm=dedup_params.num_perm,
+            dedup_bands=dedup_params.bands,
+            dedup_shingle_size=dedup_params.shingle_size,
+            dedup_batch_size=dedup_params.batch_size,
+            dedup_num_proc=dedup_params.num_proc,
+            dedup_seed=dedup_params.seed,
         )
         return data_transformation_config 
     
@@ -58,6 +76,8 @@ class ConfigurationManager:
         config = self.config.model_trainer
         train_params = self.params.TrainingArguments
         lora_params = self.params.LoRAConfig
+        cpu_params = self.params.CPUPerformance
+        dist_params = self.params.Distributed
 
         create_directories([config.root_dir])
 
@@ -77,23 +97,157 @@ class ConfigurationManager:
             lora_alpha=lora_params.lora_alpha,
             lora_dropout=lora_params.lora_dropout,
             lora_target_modules=lora_params.lora_target_modules,
-            seed=train_params.seed
+            seed=train_params.seed,
+            cpu_profile_enabled=cpu_params.enabled,
+            cpu_bf16=cpu_params.bf16,
+            torch_compile=cpu_params.torch_compile,
+            dataloader_num_workers=cpu_params.dataloader_num_workers,
+            num_threads=cpu_params.num_threads,
+            micro_batch_size=cpu_params.micro_batch_size,
+            optim=cpu_params.optim,
+            nproc_per_node=dist_params.nproc_per_node,
+            ddp_backend=dist_params.backend,
         )
 
         return model_trainer_config
     
+    def get_sweep_config(self) -> SweepConfig:
+        config = self.config.sweep
+        sweep_params = self.params.Sweep
+
+        create_directories([config.root_dir])
+
+        sweep_config = SweepConfig(
+            root_dir=Path(config.root_dir),
+            search_space=sweep_params.search_space.to_dict(),
+            max_trials=sweep_params.max_trials,
+            parallel_trials=sweep_params.parallel_trials,
+            prune_after_evals=sweep_params.prune_after_evals,
+            min_trials_to_prune=sweep_params.min_trials_to_prune,
+            rank_by=sweep_params.rank_by,
+            greater_is_better=sweep_params.greater_is_better,
+            seed=sweep_params.seed,
+        )
+
+        return sweep_config
+
     def get_model_evaluation_config(self) -> ModelEvaluationConfig:
         config = self.config.model_evaluation
+        load_dotenv()
 
         create_directories([config.root_dir])
 
+        # Set by the training job manager so a run evaluates the adapter it trained
+        adapter_path = (
+            os.environ.get(EVALUATION_ADAPTER_ENV)
+            or config.adapter_path
+            or f"{os.getenv('HUGGINGFACE_USERNAME')}/distilbart-samsum-lora"
+        )
+
         model_evaluation_config = ModelEvaluationConfig(
             root_dir=config.root_dir,
             data_path=config.data_path,
             metric_file_name=config.metric_file_name,
-            base_model_path=config.base_model_path
+            base_model_path=config.base_model_path,
+            adapter_path=adapter_path,
         )
 
         return model_evaluation_config
-    
-    
\ No newline at end of file
+
+    def get_serving_config(self, apply_tuned_profile: bool = True) -> ServingConfig:
+        config = self.config.serving
+        generation_params = self.params.GenerationProfiles
+        load_dotenv()
+
+        max_batch_size = config.max_batch_size
+        num_threads = config.num_threads
+        generation_profiles = generation_params.profiles.to_dict()
+        default_generation_profile = generation_params.default
+
+        # Settings measured on this machine by the autotuner take precedence
+        if apply_tuned_profile and os.path.exists(config.tuned_profile_file):
+            tuned = read_yaml(Path(config.tuned_profile_file))
+            if tuned.host.cpus != len(os.sched_getaffinity(0)):
+                logger.warning(f"{config.tuned_profile_file} was tuned on {tuned.host.cpus} CPUs, "
+                               f"this machine has {len(os.sched_getaffinity(0))}; consider re-running the autotuner")
+            max_batch_size = tuned.max_batch_size
+            num_threads = tuned.num_threads
+            generation_profiles["tuned"] = tuned.generation.to_dict()
+            default_generation_profile = "tuned"
+
+        serving_config = ServingConfig(
+            max_queue_size=config.max_queue_size,
+            request_timeout=config.request_timeout,
+            max_batch_size=max_batch_size,
+            bulk_max_in_flight=config.bulk_max_in_flight,
+            bulk_max_line_bytes=config.bulk_max_line_bytes,
+            bulk_queue_headroom=config.bulk_queue_headroom,
+            max_input_tokens=config.max_input_tokens,
+            extractive_preselection=config.extractive_preselection,
+            encoding_cache_size=config.encoding_cache_size,
+            input_length_buckets=list(config.input_length_buckets),
+            echo_dialogue=config.echo_dialogue,
+            base_model_path=config.base_model_path,
+            default_adapter=config.default_adapter,
+            adapters={name: path.format(**os.environ) for name, path in config.adapters.items()},
+            max_loaded_adapters=config.max_loaded_adapters,
+            adapter_memory_budget_mb=config.adapter_memory_budget_mb,
+            generation_profiles=generation_profiles,
+            default_generation_profile=default_generation_profile,
+            draft_model_path=config.draft_model_path,
+            draft_adapter=config.draft_adapter,
+            num_threads=num_threads,
+        )
+
+        return serving_config
+
+    def get_training_job_config(self) -> TrainingJobConfig:
+        config = self.config.training_jobs
+
+        training_job_config = TrainingJobConfig(
+            root_dir=Path(config.root_dir),
+            command=list(config.command),
+            adapter_dir=Path(config.adapter_dir),
+            metric_file_name=Path(config.metric_file_name),
+            min_rougeL=config.min_rougeL,
+            max_rougeL_drop=config.max_rougeL_drop,
+            cancel_grace_period=config.cancel_grace_period,
+        )
+
+        return training_job_config
+
+    def get_autotune_config(self) -> AutotuneConfig:
+        config = self.config.autotune
+        search_params = self.params.Autotune
+
+        create_directories([config.root_dir])
+
+        autotune_config = AutotuneConfig(
+            root_dir=Path(config.root_dir),
+            sample_file=config.sample_file,
+            test_data_path=Path(config.test_data_path),
+            num_samples=config.num_samples,
+            report_file=Path(config.report_file),
+            profile_file=Path(self.config.serving.tuned_profile_file),
+            num_threads=list(search_params.num_threads),
+            max_batch_size=list(search_params.max_batch_size),
+            num_beams=list(search_params.num_beams),
+            max_length=list(search_params.max_length),
+            max_rouge_drop=search_params.max_rouge_drop,
+            objective=search_params.objective,
+        )
+
+        return autotune_config
+
+    def get_logging_config(self) -> LoggingConfig:
+        config = self.config.logging
+
+        logging_config = LoggingConfig(
+            json_format=config.json_format,
+            sampling=config.sampling.to_dict(),
+            max_payload_chars=config.max_payload_chars,
+            redact_payloads=config.redact_payloads,
+            echo_payloads=config.echo_payloads,
+        )
+
+        return logging_config
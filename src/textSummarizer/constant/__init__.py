@@ -1,4 +1,6 @@
 from pathlib import Path
 
 CONFIG_FILE_PATH = Path("config/config.yaml")
-PARAMS_FILE_PATH = Path("params.yaml")
\ No newline at end of file
+PARAMS_FILE_PATH = Path("params.yaml")
+# Overrides model_evaluation.adapter_path, set for the runs of training jobs
+EVALUATION_ADAPTER_ENV = "MODEL_EVALUATION_ADAPTER_PATH"
@@ -7,7 +7,10 @@ from pathlib import Path
 class DataIngestionConfig:
     root_dir: Path
     repo_id: Path
-    local_dir_use_symlinks: bool
+    source_dir: Path
+    manifest_file: Path
+    max_workers: int
+    refresh: bool
 
 
 
@@ -24,6 +27,16 @@ class DataTransformationConfig:
     root_dir: Path
     data_path: Path
     tokenizer_path: Path
+    dedup_report_file: Path
+    dedup_enabled: bool
+    dedup_drop: bool
+    dedup_threshold: float
+    dedup_num_perm: int
+    dedup_bands: int
+    dedup_shingle_size: int
+    dedup_batch_size: int
+    dedup_num_proc: int
+    dedup_seed: int
 
 
 
@@ -45,6 +58,15 @@ class ModelTrainerConfig:
     lora_dropout: float
     lora_target_modules: list
     seed: int
+    cpu_profile_enabled: bool
+    cpu_bf16: bool
+    torch_compile: bool
+    dataloader_num_workers: int
+    num_threads: int
+    micro_batch_size: int
+    optim: str
+    nproc_per_node: int
+    ddp_backend: str
 
 
 @dataclass(frozen=True)
@@ -52,4 +74,79 @@ class ModelEvaluationConfig:
     root_dir: Path
     data_path: Path
     metric_file_name: Path
-    base_model_path: str
\ No newline at end of file
+    base_model_path: str
+    adapter_path: str
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    root_dir: Path
+    search_space: dict
+    max_trials: int
+    parallel_trials: int
+    prune_after_evals: int
+    min_trials_to_prune: int
+    rank_by: str
+    greater_is_better: bool
+    seed: int
+
+
+@dataclass(frozen=True)
+class ServingConfig:
+    max_queue_size: int
+    request_timeout: float
+    max_batch_size: int
+    bulk_max_in_flight: int
+    bulk_max_line_bytes: int
+    bulk_queue_headroom: int
+    max_input_tokens: int
+    extractive_preselection: bool
+    encoding_cache_size: int
+    input_length_buckets: list
+    echo_dialogue: bool
+    base_model_path: str
+    default_adapter: str
+    adapters: dict
+    max_loaded_adapters: int
+    adapter_memory_budget_mb: float
+    generation_profiles: dict
+    default_generation_profile: str
+    draft_model_path: str
+    draft_adapter: str
+    num_threads: int
+
+
+@dataclass(frozen=True)
+class TrainingJobConfig:
+    root_dir: Path
+    command: list
+    adapter_dir: Path
+    metric_file_name: Path
+    min_rougeL: float
+    max_rougeL_drop: float
+    cancel_grace_period: float
+
+
+@dataclass(frozen=True)
+class AutotuneConfig:
+    root_dir: Path
+    sample_file: str
+    test_data_path: Path
+    num_samples: int
+    report_file: Path
+    profile_file: Path
+    num_threads: list
+    max_batch_size: list
+    num_beams: list
+    max_length: list
+    max_rouge_drop: float
+    objective: str
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    json_format: bool
+    sampling: dict
+    max_payload_chars: int
+    redact_payloads: bool
+    echo_payloads: bool
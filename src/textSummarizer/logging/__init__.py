@@ -1,21 +1,148 @@
 import os
 import sys
+import json
+import queue
+import atexit
+import random
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 logging_str = "[%(asctime)s: %(levelname)s: %(module)s: %(message)s]"
 log_dir = "logs"
 log_filepath = os.path.join(log_dir, 'running_logs.log')
-os.makedirs(log_dir, exist_ok=True)
+
+# Request-path settings, replaced by configure_logging()
+_settings = {
+    "sampling": {"default": 1.0},
+    "max_payload_chars": 200,
+    "redact_payloads": False,
+    "echo_payloads": False,
+}
+PAYLOAD_FIELDS = ("text", "dialogue", "summary")
+
+
+class LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates the log directory and file on the first record, not on import"""
+
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class TextFormatter(logging.Formatter):
+    """The classic bracketed line, with structured fields appended as key=value"""
+
+    def format(self, record):
+        fields = getattr(record, "fields", None)
+        if fields:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = record.getMessage() + " " + " ".join(f"{k}={v!r}" for k, v in fields.items())
+            record.args = None
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, structured fields as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str)
+
+
+# Handlers do their (blocking) I/O on a background thread; the calling thread
+# only puts the record on an in-memory queue.
+_handlers = [
+    LazyFileHandler(log_filepath),
+    logging.StreamHandler(sys.stdout)
+]
+for _handler in _handlers:
+    _handler.setFormatter(TextFormatter(logging_str))
+
+_queue = queue.SimpleQueue()
+_listener = QueueListener(_queue, *_handlers, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
+
+def _use_direct_handlers():
+    # The listener thread does not survive fork, write directly in child processes
+    logging.getLogger().handlers = list(_handlers)
+
+
+os.register_at_fork(after_in_child=_use_direct_handlers)
+
+# Formatting happens on the listener side, only merge args/tracebacks here
+_queue_handler = QueueHandler(_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
 
 
 logging.basicConfig(
     level = logging.INFO,
-    format = logging_str,
 
     handlers = [
-        logging.FileHandler(log_filepath),
-        logging.StreamHandler(sys.stdout)
+        _queue_handler,
     ]
 )
 
 logger = logging.getLogger("textSummarizerLogger")
+
+
+def configure_logging(config):
+    """Apply the `logging` section of config.yaml
+
+    Args:
+        config (LoggingConfig): output format, per-route sampling rates and
+            payload handling for request-path records
+    """
+    formatter = JsonFormatter() if config.json_format else TextFormatter(logging_str)
+    for handler in _handlers:
+        handler.setFormatter(formatter)
+
+    _settings.update(
+        sampling={"default": 1.0, **config.sampling},
+        max_payload_chars=config.max_payload_chars,
+        redact_payloads=config.redact_payloads,
+        echo_payloads=config.echo_payloads,
+    )
+
+
+def _sampled(route: str) -> bool:
+    sampling = _settings["sampling"]
+    rate = sampling.get(route, sampling["default"])
+    return rate >= 1.0 or random.random() < rate
+
+
+def _scrub(value: str) -> str:
+    if _settings["redact_payloads"]:
+        return f"<redacted {len(value)} chars>"
+    limit = _settings["max_payload_chars"]
+    if len(value) > limit:
+        return value[:limit] + f"... <{len(value) - limit} more chars>"
+    return value
+
+
+def log_request(route: str, message: str, **fields):
+    """Log a request-path record, subject to the route's sampling rate
+
+    Payload fields (text, dialogue, summary) are redacted or truncated.
+    """
+    if not _sampled(route):
+        return
+    for name in PAYLOAD_FIELDS:
+        if name in fields:
+            fields[name] = _scrub(fields[name])
+    logger.info(message, extra={"fields": {"route": route, **fields}}, stacklevel=2)
+
+
+def echo_payloads() -> bool:
+    """Whether request payloads (dialogues and summaries) may be logged at all"""
+    return _settings["echo_payloads"]
@@ -0,0 +1,138 @@
+import json
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+
+def _parse_record(line: bytes):
+    """Parse one NDJSON line into (record, error); blank lines give (None, None)"""
+    line = line.strip()
+    if not line:
+        return None, None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return None, "Each line must be a JSON object"
+    text = record.get("text")
+    if not isinstance(text, str) or not text.strip():
+        return record, "Text cannot be empty"
+    return record, None
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int):
+    """Split a byte stream into NDJSON records, holding at most one line in memory
+
+    Lines longer than `max_line_bytes` are skipped and reported as errors.
+
+    Yields:
+        tuple: (record dict or None, error message or None)
+    """
+    too_long = f"Line longer than {max_line_bytes} bytes"
+    buffer = bytearray()
+    skipping = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        # Drop the rest of this line as it arrives
+                        skipping = True
+                        buffer.clear()
+                break
+
+            if skipping:
+                skipping = False
+                yield None, too_long
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield None, too_long
+                else:
+                    record, error = _parse_record(buffer)
+                    if record is not None or error is not None:
+                        yield record, error
+            buffer.clear()
+            start = end + 1
+
+    if skipping:
+        yield None, too_long
+    elif buffer.strip():
+        yield _parse_record(buffer)
+
+
+async def summarize_stream(
+    records: AsyncIterator[tuple],
+    submit: Callable[[dict], Awaitable[str]],
+    max_in_flight: int,
+    wait_for_disconnect: Optional[Callable[[], Awaitable[None]]] = None,
+):
+    """Summarize records as they arrive and yield results in completion order
+
+    At most `max_in_flight` records are being summarized or waiting to be sent
+    at any time; beyond that, reading stops until results are consumed, so
+    the input is never buffered. A failing record yields an error result and
+    does not stop the stream.
+
+    Args:
+        records: (record, error) pairs, as produced by `iter_ndjson`
+        submit: coroutine function summarizing one record
+        max_in_flight (int): records admitted but not yet yielded
+        wait_for_disconnect: coroutine function returning when the client goes
+            away; watched once all input is read, stopping outstanding work
+
+    Yields:
+        dict: {"id", "summary"} or {"id", "error"} per record
+    """
+    results = asyncio.Queue()
+    slots = asyncio.Semaphore(max_in_flight)
+    pending = set()
+    end = object()
+
+    async def summarize(record):
+        try:
+            result = {"id": record.get("id"), "summary": await submit(record)}
+        except Exception as e:
+            result = {"id": record.get("id"), "error": str(e)}
+        results.put_nowait(result)
+
+    async def feed():
+        try:
+            async for record, error in records:
+                await slots.acquire()
+                if error is not None:
+                    results.put_nowait({"id": record.get("id") if record else None, "error": error})
+                    continue
+                task = asyncio.ensure_future(summarize(record))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                # All input read, finish outstanding work unless the client leaves
+                waiters = {asyncio.ensure_future(asyncio.wait(set(pending)))}
+                if wait_for_disconnect is not None:
+                    waiters.add(asyncio.ensure_future(wait_for_disconnect()))
+                _, unfinished = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in unfinished:
+                    waiter.cancel()
+        finally:
+            results.put_nowait(end)
+
+    feeder = asyncio.ensure_future(feed())
+    try:
+        while True:
+            result = await results.get()
+            if result is end:
+                break
+            yield result
+            slots.release()
+        # Surface errors reading the input, e.g. the client disconnecting mid-body
+        await feeder
+    finally:
+        feeder.cancel()
+        for task in list(pending):
+            task.cancel()
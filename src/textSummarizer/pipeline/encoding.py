@@ -0,0 +1,117 @@
+import bisect
+import threading
+from collections import OrderedDict
+import numpy as np
+import torch
+from textSummarizer.logging import logger
+from textSummarizer.utils.metrics import observe_stage, record_cache_lookup
+
+
+class InputEncoder:
+    """Encode serving inputs with as little per-request Python work as possible
+
+    Texts are encoded in one call to the fast tokenizer, whose Rust core
+    splits the batch across threads, and the token ids of recently seen texts
+    are kept in an LRU so repeated inputs skip tokenization entirely. Batches
+    are padded to their longest input and written into input buffers
+    allocated once per length bucket and reused, so a request allocates no
+    tensors.
+    """
+
+    def __init__(self, tokenizer, max_input_tokens: int, cache_size: int, length_buckets: list, device: str = "cpu"):
+        if not tokenizer.is_fast:
+            logger.warning(f"{type(tokenizer).__name__} is not a fast tokenizer, batches are encoded on one thread")
+        self.tokenizer = tokenizer
+        self.max_input_tokens = max_input_tokens
+        self.cache_size = cache_size
+        self.device = device
+        self.buckets = sorted({b for b in length_buckets if b < max_input_tokens} | {max_input_tokens})
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Bucket length -> flat host arrays and tensors, grown to the largest batch seen
+        self._buffers = {}
+
+    def encode(self, texts: list, preselect=None) -> list:
+        """Token ids of each text, truncated to the input budget, special tokens included
+
+        Args:
+            texts (list): texts as received
+            preselect (callable, optional): shortens an over-length text before
+                tokenizing; only applied on cache misses, as the cache holds
+                the ids of the shortened text under the original one
+        """
+        encoded = [None] * len(texts)
+        misses = {}
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                ids = self._cache.get(text)
+                record_cache_lookup("encoding", ids is not None)
+                if ids is None:
+                    misses.setdefault(text, []).append(i)
+                else:
+                    self._cache.move_to_end(text)
+                    encoded[i] = ids
+
+        if misses:
+            inputs = list(misses)
+            if preselect is not None:
+                with observe_stage("preselect"):
+                    inputs = [preselect(text) for text in inputs]
+            new_ids = self.tokenizer(
+                inputs, max_length=self.max_input_tokens, truncation=True
+            )["input_ids"]
+            with self._cache_lock:
+                for (text, rows), ids in zip(misses.items(), new_ids):
+                    for i in rows:
+                        encoded[i] = ids
+                    if self.cache_size > 0:
+                        self._cache[text] = ids
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return encoded
+
+    def bucket(self, length: int) -> int:
+        """Smallest bucket holding `length` tokens"""
+        return self.buckets[min(bisect.bisect_left(self.buckets, length), len(self.buckets) - 1)]
+
+    def to_tensors(self, encoded: list) -> dict:
+        """Pad encoded inputs to the longest one, in the reusable buffers of its bucket
+
+        Each bucket owns flat buffers big enough for its widest batch; a batch
+        uses their first rows x longest elements, so the tensors are
+        contiguous and padded no further than `padding=True` would. They are
+        views of the buffers and are overwritten by the next call, so callers
+        must serialize calls and finish with the tensors before the next one
+        (the prediction pipeline holds its model lock for both).
+        """
+        rows, length = len(encoded), max(len(ids) for ids in encoded)
+        bucket = self.bucket(length)
+        buffers = self._buffers.get(bucket)
+        if buffers is None or buffers["input_ids"].size < rows * bucket:
+            logger.info(f"Allocating input buffers for {rows} x {bucket} tokens")
+            buffers = {name: np.empty(rows * bucket, dtype=np.int64) for name in ("input_ids", "attention_mask")}
+            # On the CPU the tensors share the numpy memory, elsewhere they are copied into device buffers
+            buffers["tensors"] = {
+                name: torch.from_numpy(buffers[name]) if self.device == "cpu"
+                else torch.empty(rows * bucket, dtype=torch.long, device=self.device)
+                for name in ("input_ids", "attention_mask")
+            }
+            self._buffers[bucket] = buffers
+
+        size = rows * length
+        input_ids = buffers["input_ids"][:size].reshape(rows, length)
+        attention_mask = buffers["attention_mask"][:size].reshape(rows, length)
+        input_ids.fill(self.tokenizer.pad_token_id)
+        attention_mask.fill(0)
+        # numpy converts a whole row of ids at once
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        tensors = {name: tensor[:size].view(rows, length) for name, tensor in buffers["tensors"].items()}
+        if self.device != "cpu":
+            tensors["input_ids"].copy_(torch.from_numpy(input_ids), non_blocking=True)
+            tensors["attention_mask"].copy_(torch.from_numpy(attention_mask), non_blocking=True)
+        return tensors
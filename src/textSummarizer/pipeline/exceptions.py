@@ -0,0 +1,6 @@
+class UnknownAdapterError(Exception):
+    """The requested adapter is not configured"""
+
+
+class UnknownProfileError(Exception):
+    """The requested generation profile is not configured"""
@@ -0,0 +1,20 @@
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.components.hyperparameter_sweep import HyperparameterSweep
+from textSummarizer.logging import logger
+
+
+class HyperparameterSweepPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        sweep_config = config.get_sweep_config()
+        model_trainer_config = config.get_model_trainer_config()
+        sweep = HyperparameterSweep(config=sweep_config, trainer_config=model_trainer_config)
+        leaderboard = sweep.run()
+        logger.info(f"Best trial: {leaderboard.iloc[0].to_dict()}")
+
+
+if __name__ == "__main__":
+    HyperparameterSweepPipeline().main()
@@ -0,0 +1,256 @@
+import asyncio
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from textSummarizer.logging import logger
+from textSummarizer.utils.metrics import QUEUE_WAIT, REJECTED
+
+
+class QueueFullError(Exception):
+    """The request queue is at capacity, the caller should retry later"""
+
+
+class DeadlineExceededError(Exception):
+    """The request was not served before its deadline"""
+
+
+class ExecutorClosedError(Exception):
+    """The executor is not accepting work (not started or shutting down)"""
+
+
+@dataclass
+class InferenceJob:
+    text: str
+    adapter: Optional[str]
+    profile: Optional[str]
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    enqueued_at: float
+    deadline: float
+    started_at: float = 0.0
+
+    @property
+    def batch_key(self) -> tuple:
+        return self.adapter, self.profile
+
+    @property
+    def queue_time(self) -> float:
+        return self.started_at - self.enqueued_at
+
+
+class InferenceExecutor:
+    """Runs blocking inference on a dedicated worker thread behind a bounded queue
+
+    Requests beyond `max_queue_size` are rejected immediately instead of piling
+    up, requests still queued when their deadline passes are dropped without
+    running, and a request whose caller went away is removed from the queue.
+
+    The worker serves the oldest request together with up to
+    `max_batch_size - 1` other queued requests for the same adapter and
+    generation profile, so every batch runs with a single active adapter.
+    """
+
+    def __init__(
+        self,
+        predict_batch_fn: Callable[[list, Optional[str], Optional[str]], list],
+        max_queue_size: int,
+        request_timeout: float,
+        max_batch_size: int = 1,
+    ):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_queue_size = max_queue_size
+        self.request_timeout = request_timeout
+        self.max_batch_size = max_batch_size
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        # (loop, event) of callers waiting for the queue to shrink
+        self._capacity_waiters = []
+        self._closed = True
+        self._thread = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        with self._cond:
+            self._closed = False
+        self._thread = threading.Thread(target=self._run, name="inference-worker", daemon=True)
+        self._thread.start()
+        logger.info(f"Inference executor started (max queue size {self.max_queue_size})")
+
+    def shutdown(self, timeout: float = None):
+        with self._cond:
+            self._closed = True
+            pending = list(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+
+        self._notify_capacity()
+        for job in pending:
+            self._resolve(job, exc=ExecutorClosedError("Server is shutting down"))
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info("Inference executor stopped")
+
+    async def submit(self, text: str, adapter: str = None, profile: str = None):
+        """Queue `text` for inference with `adapter` and `profile` and wait for the result
+
+        Raises:
+            QueueFullError: if the queue is at capacity
+            ExecutorClosedError: if the executor is not running
+            DeadlineExceededError: if no result was ready within the request timeout
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        job = InferenceJob(
+            text=text,
+            adapter=adapter,
+            profile=profile,
+            loop=loop,
+            future=loop.create_future(),
+            enqueued_at=now,
+            deadline=now + self.request_timeout,
+        )
+
+        with self._cond:
+            if self._closed:
+                REJECTED.labels("closed").inc()
+                raise ExecutorClosedError("Inference executor is not running")
+            if len(self._queue) >= self.max_queue_size:
+                REJECTED.labels("queue_full").inc()
+                raise QueueFullError(f"Request queue is full ({self.max_queue_size} pending)")
+            self._queue.append(job)
+            self._cond.notify()
+
+        try:
+            return await asyncio.wait_for(job.future, timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self._discard(job)
+            REJECTED.labels("deadline").inc()
+            raise DeadlineExceededError(f"No result within {self.request_timeout}s")
+        except asyncio.CancelledError:
+            # Caller went away, free its queue slot
+            if self._discard(job):
+                REJECTED.labels("cancelled").inc()
+            raise
+
+    async def wait_for_capacity(self, max_depth: int, timeout: float):
+        """Wait, without polling, until fewer than `max_depth` requests are queued
+
+        A caller that then submits without awaiting anything in between is
+        sure to find the queue below `max_depth`, as only the worker shrinks it
+        concurrently.
+
+        Raises:
+            DeadlineExceededError: if the queue did not shrink within `timeout`
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while len(self._queue) >= max_depth and not self._closed:
+            waiter = (loop, asyncio.Event())
+            with self._cond:
+                self._capacity_waiters.append(waiter)
+            try:
+                # Re-check now that a wake-up cannot be missed
+                if len(self._queue) < max_depth:
+                    return
+                await asyncio.wait_for(waiter[1].wait(), timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError(f"No queue slot within {timeout}s")
+            finally:
+                with self._cond:
+                    if waiter in self._capacity_waiters:
+                        self._capacity_waiters.remove(waiter)
+
+    def _notify_capacity(self):
+        """Wake every capacity waiter; they re-check the queue themselves"""
+        with self._cond:
+            waiters, self._capacity_waiters = self._capacity_waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    def _discard(self, job: InferenceJob) -> bool:
+        with self._cond:
+            try:
+                self._queue.remove(job)
+            except ValueError:
+                # Already picked up by the worker
+                return False
+        self._notify_capacity()
+        return True
+
+    def _next_batch(self):
+        """Take the oldest job plus queued jobs for the same adapter and profile, in arrival order"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+
+            first = self._queue.popleft()
+            batch = [first]
+            if self.max_batch_size > 1:
+                rest = collections.deque()
+                for job in self._queue:
+                    if job.batch_key == first.batch_key and len(batch) < self.max_batch_size:
+                        batch.append(job)
+                    else:
+                        rest.append(job)
+                self._queue = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._notify_capacity()
+
+            now = time.monotonic()
+            live = []
+            for job in batch:
+                if job.future.done():
+                    # Cancelled after it was queued
+                    continue
+                job.started_at = now
+                QUEUE_WAIT.observe(job.queue_time)
+                if now > job.deadline:
+                    logger.warning(f"Dropping request after {job.queue_time:.2f}s in queue (deadline passed)")
+                    self._resolve(job, exc=DeadlineExceededError(f"Waited {job.queue_time:.2f}s in queue"))
+                    continue
+                live.append(job)
+            if not live:
+                continue
+
+            try:
+                results = self.predict_batch_fn([job.text for job in live], *live[0].batch_key)
+            except Exception as e:
+                for job in live:
+                    self._resolve(job, exc=e)
+            else:
+                for job, result in zip(live, results):
+                    self._resolve(job, result=result)
+
+    @staticmethod
+    def _resolve(job: InferenceJob, result=None, exc: Exception = None):
+        def _set():
+            if job.future.done():
+                return
+            if exc is not None:
+                job.future.set_exception(exc)
+            else:
+                job.future.set_result(result)
+
+        try:
+            job.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # Event loop already closed
+            pass
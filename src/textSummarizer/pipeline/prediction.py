@@ -1,66 +1,340 @@
 import os
+import time
+import threading
 import torch
+from collections import OrderedDict
 from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.entity import ServingConfig
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 from peft import PeftModel
-from dotenv import load_dotenv
-from textSummarizer.logging import logger
+from huggingface_hub import snapshot_download
+from torch.nn.utils.rnn import pad_sequence
+from textSummarizer.logging import logger, log_request, echo_payloads
+from textSummarizer.pipeline.exceptions import UnknownAdapterError, UnknownProfileError
+from textSummarizer.pipeline.preselection import TurnPreselector
+from textSummarizer.pipeline.encoding import InputEncoder
+from textSummarizer.utils.performance import configure_torch_threads
+from textSummarizer.utils.metrics import (
+    BATCH_SIZE,
+    DRAFT_TOKENS,
+    INPUT_TOKENS,
+    OUTPUT_TOKENS,
+    PRESELECTED_INPUTS,
+    PRESELECTION_DROPPED_TOKENS,
+    observe_stage,
+    record_cache_lookup,
+)
 
 
 class PredictionPipeline:
-    def __init__(self):
-        self.config = ConfigurationManager().get_model_evaluation_config()
-        load_dotenv()
-        
+    def __init__(self, config: ServingConfig = None):
+        self.config = config or ConfigurationManager().get_serving_config()
+        # Seconds spent in each loading phase, reported by the readiness probe
+        self.load_timings = {}
+        start = time.perf_counter()
+
         # Setup device
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        # Get HF repo ID from environment
-        username = os.getenv('HUGGINGFACE_USERNAME')
-        self.repo_id = f"{username}/distilbart-samsum-lora"
-        
-        # Load base model and LoRA adapter
-        logger.info(f"Loading base model: sshleifer/distilbart-cnn-12-6")
-        self.base_model = AutoModelForSeq2SeqLM.from_pretrained("sshleifer/distilbart-cnn-12-6")
+        if self.config.num_threads is not None:
+            configure_torch_threads(self.config.num_threads)
+
+        # Named LoRA adapters served on one shared base model
+        self.adapters = dict(self.config.adapters)
+        self.default_adapter = self.config.default_adapter
+        self.repo_id = self.adapters[self.default_adapter]
+
+        # Load base model and the default LoRA adapter
+        logger.info(f"Loading base model: {self.config.base_model_path}")
+        self.base_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.base_model_path)
         self.base_model.config.use_cache = True
-        
-        logger.info(f"Loading LoRA adapter from: {self.repo_id}")
-        self.model = PeftModel.from_pretrained(self.base_model, self.repo_id)
+        start = self._record_timing("base_model", start)
+
+        logger.info(f"Loading LoRA adapter {self.default_adapter} from: {self.repo_id}")
+        self.model = PeftModel.from_pretrained(self.base_model, self.repo_id, adapter_name=self.default_adapter)
         self.model = self.model.to(self.device)
-        
+        self.model.eval()
+
+        # Adapter name -> name of its weights inside the PeftModel (changes on
+        # hot swap), and the loaded adapters in LRU order with their size in bytes
+        self._peft_names = {self.default_adapter: self.default_adapter}
+        self._loaded = OrderedDict([(self.default_adapter, self._adapter_bytes(self.default_adapter))])
+        # Adapter path or repo id -> local directory with its weights
+        self._local_paths = {}
+        self.adapter_version = 0
+        start = self._record_timing("adapter", start)
+
+        # Held while the model runs, so adapters are never swapped mid-generation
+        self._model_lock = threading.Lock()
+
         # Load tokenizer from HF repo
         logger.info(f"Loading tokenizer from: {self.repo_id}")
         self.tokenizer = AutoTokenizer.from_pretrained(self.repo_id)
+        start = self._record_timing("tokenizer", start)
+
+        # Over-length dialogues keep their most salient turns instead of just the head
+        self.max_input_tokens = self.config.max_input_tokens
+        self.preselector = None
+        if self.config.extractive_preselection:
+            self.preselector = TurnPreselector(self.tokenizer, self.max_input_tokens)
+        self.encoder = InputEncoder(
+            self.tokenizer,
+            self.max_input_tokens,
+            cache_size=self.config.encoding_cache_size,
+            length_buckets=self.config.input_length_buckets,
+            device=self.device,
+        )
+
+        # Generation settings by profile; the draft model is loaded on first use
+        self.profiles = self.config.generation_profiles
+        self.default_profile = self.config.default_generation_profile
+        self.draft_model = None
+        self.draft_stats = {"proposed": 0, "accepted": 0}
+        self._forward_calls = {"target": 0, "draft": 0}
+        self.base_model.register_forward_hook(self._counter("target"))
+        if self.profiles[self.default_profile].get("assisted"):
+            self._load_draft_model()
+            self._record_timing("draft_model", start)
+
+    def _record_timing(self, phase, start):
+        now = time.perf_counter()
+        self.load_timings[phase] = round(now - start, 3)
+        return now
+
+    def warm_up(self, text="A: Hi, are we still on for lunch tomorrow?\nB: Yes, see you at noon."):
+        """Run one generate call with the default adapter and profile
+
+        The first call pays for lazy initialisation (allocator, kernels, caches),
+        so run it before declaring the server ready.
+        """
+        start = time.perf_counter()
+        self.predict(text)
+        self._record_timing("warmup", start)
+
+    @property
+    def adapter_name(self):
+        """Name of the default adapter's weights inside the PeftModel"""
+        return self._peft_names[self.default_adapter]
+
+    def resolve_adapter(self, adapter=None):
+        """Map a requested adapter (None for the default) to a configured name
+
+        Raises:
+            UnknownAdapterError: if the adapter is not configured
+        """
+        adapter = adapter or self.default_adapter
+        if adapter not in self.adapters:
+            raise UnknownAdapterError(f"Unknown adapter '{adapter}', available: {sorted(self.adapters)}")
+        return adapter
+
+    def resolve_profile(self, profile=None):
+        """Map a requested generation profile (None for the default) to a configured name
+
+        Raises:
+            UnknownProfileError: if the profile is not configured
+        """
+        profile = profile or self.default_profile
+        if profile not in self.profiles:
+            raise UnknownProfileError(f"Unknown profile '{profile}', available: {sorted(self.profiles)}")
+        return profile
+
+    def _counter(self, model):
+        def hook(module, args, output):
+            self._forward_calls[model] += 1
+        return hook
+
+    def _load_draft_model(self):
+        logger.info(f"Loading draft model: {self.config.draft_model_path}")
+        draft_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.draft_model_path)
+        if self.config.draft_adapter:
+            logger.info(f"Merging draft LoRA adapter from: {self.config.draft_adapter}")
+            draft_model = PeftModel.from_pretrained(draft_model, self.config.draft_adapter).merge_and_unload()
+        draft_model.config.use_cache = True
+        draft_model = draft_model.to(self.device).eval()
+        draft_model.register_forward_hook(self._counter("draft"))
+        self.draft_model = draft_model
+
+    @property
+    def draft_acceptance_rate(self):
+        """Share of draft tokens accepted by the main model since startup"""
+        proposed = self.draft_stats["proposed"]
+        return self.draft_stats["accepted"] / proposed if proposed else 0.0
+
+    def _assisted_generate(self, inputs, settings):
+        """Greedy generation where the draft model proposes tokens and the main model verifies them
+
+        Assisted generation only supports one sequence at a time, so the batch is
+        run row by row. Must be called with the model lock held.
+        """
+        if self.draft_model is None:
+            self._load_draft_model()
+
+        outputs = []
+        for input_ids, attention_mask in zip(inputs["input_ids"], inputs["attention_mask"]):
+            keep = attention_mask.bool()
+            target_before = self._forward_calls["target"]
+            draft_before = self._forward_calls["draft"]
+
+            output = self.model.generate(
+                input_ids=input_ids[keep].unsqueeze(0),
+                attention_mask=attention_mask[keep].unsqueeze(0),
+                assistant_model=self.draft_model,
+                **settings
+            )[0]
+            outputs.append(output)
 
-    
-    def predict(self, text):
+            # Every verification pass accepts some draft tokens plus one token of
+            # its own, the first output token is the decoder start token
+            verify_calls = self._forward_calls["target"] - target_before
+            proposed = self._forward_calls["draft"] - draft_before
+            accepted = max(0, len(output) - 1 - verify_calls)
+            self.draft_stats["proposed"] += proposed
+            self.draft_stats["accepted"] += accepted
+            DRAFT_TOKENS.labels("proposed").inc(proposed)
+            DRAFT_TOKENS.labels("accepted").inc(accepted)
+
+        return pad_sequence(outputs, batch_first=True, padding_value=self.tokenizer.pad_token_id)
+
+    def _adapter_bytes(self, peft_name):
+        marker = f".{peft_name}."
+        return sum(p.numel() * p.element_size() for n, p in self.model.named_parameters() if marker in n)
+
+    def adapter_fetched(self, adapter) -> bool:
+        """Whether `adapter` can be activated without downloading anything"""
+        return adapter in self._loaded or self.adapters[adapter] in self._local_paths
+
+    def fetch_adapter(self, adapter):
+        """Local directory with `adapter`'s weights, downloading them from the Hub if needed
+
+        Called without the model lock, so a download never stalls generation
+        with other adapters; the server runs it before queueing the request.
+        """
+        path = self.adapters[adapter]
+        if path not in self._local_paths:
+            if os.path.isdir(path):
+                self._local_paths[path] = path
+            else:
+                logger.info(f"Downloading LoRA adapter {adapter} from: {path}")
+                self._local_paths[path] = snapshot_download(path)
+        return self._local_paths[path]
+
+    def _activate(self, adapter, local_path):
+        """Make `adapter` the active one, loading it from `local_path` and evicting others as needed
+
+        Must be called with the model lock held.
+        """
+        hit = adapter in self._loaded
+        record_cache_lookup("adapter", hit)
+        if hit:
+            self._loaded.move_to_end(adapter)
+        else:
+            # Evicted since the caller checked, it was fetched when first loaded
+            local_path = local_path or self.fetch_adapter(adapter)
+            logger.info(f"Loading LoRA adapter {adapter} from: {local_path}")
+            self.model.load_adapter(local_path, adapter_name=adapter)
+            self._peft_names[adapter] = adapter
+            self._loaded[adapter] = self._adapter_bytes(adapter)
+            self._evict(keep=adapter)
+
+        self.model.set_adapter(self._peft_names[adapter])
+
+    def _evict(self, keep):
+        budget = self.config.adapter_memory_budget_mb * 1024 * 1024
+        for name in list(self._loaded):
+            over_count = len(self._loaded) > self.config.max_loaded_adapters
+            over_budget = sum(self._loaded.values()) > budget
+            if not (over_count or over_budget):
+                break
+            # The default adapter stays resident
+            if name in (keep, self.default_adapter):
+                continue
+            logger.info(f"Evicting LoRA adapter {name}")
+            self.model.delete_adapter(self._peft_names.pop(name))
+            del self._loaded[name]
+
+    def swap_adapter(self, adapter_path, adapter=None):
+        """Replace a live LoRA adapter with the one saved at `adapter_path`
+
+        The new adapter is loaded next to the current one and activated between
+        two generate calls; requests already running finish on the old adapter
+        and queued requests are served by the new one.
+        """
+        adapter = self.resolve_adapter(adapter)
+        self.adapter_version += 1
+        new_name = f"{adapter}-v{self.adapter_version}"
+        logger.info(f"Loading LoRA adapter {new_name} from: {adapter_path}")
+
+        with self._model_lock:
+            self.adapters[adapter] = adapter_path
+            old_name = self._peft_names.get(adapter)
+            if old_name is None:
+                # Not resident, it will be loaded from the new path on first use
+                return
+            self.model.load_adapter(adapter_path, adapter_name=new_name)
+            self._peft_names[adapter] = new_name
+            self.model.set_adapter(new_name)
+            self.model.delete_adapter(old_name)
+            self._loaded[adapter] = self._adapter_bytes(new_name)
+
+        logger.info(f"Serving LoRA adapter {new_name} (replaced {old_name})")
+
+    def _preselect(self, text):
+        text, total, dropped = self.preselector.select(text)
+        if dropped:
+            PRESELECTED_INPUTS.inc()
+            PRESELECTION_DROPPED_TOKENS.observe(dropped)
+            log_request("inference", "Pre-selected turns of an over-length input",
+                        input_tokens=total, dropped_tokens=dropped, budget=self.max_input_tokens)
+        return text
+
+    def predict(self, text, adapter=None, profile=None):
         """Predict summary for given text"""
-        logger.info("Generating summary...")
-        
-        # Tokenize input
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            max_length=1024,
-            truncation=True
-        ).to(self.device)
-        
+        return self.predict_batch([text], adapter, profile)[0]
+
+    def predict_batch(self, texts, adapter=None, profile=None):
+        """Predict summaries for several texts with one adapter and generation profile"""
+        adapter = self.resolve_adapter(adapter)
+        profile = self.resolve_profile(profile)
+        settings = dict(self.profiles[profile])
+        assisted = settings.pop("assisted", False)
+        log_request("inference", "Generating summaries", batch_size=len(texts), adapter=adapter, profile=profile)
+
+        # Tokenize input. Repeated texts come from the encoding cache, keyed on
+        # the text as received, so an over-length one is only pre-selected once;
+        # the time includes pre-selecting cache misses, also timed on its own.
+        preselect = self._preselect if self.preselector is not None else None
+        with observe_stage("tokenize"):
+            encoded = self.encoder.encode(texts, preselect=preselect)
+
+        # Download a cold adapter before taking the model lock
+        local_path = None if adapter in self._loaded else self.fetch_adapter(adapter)
+
         # Generate summary
-        summary_ids = self.model.generate(
-            input_ids=inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            max_length=128,
-            num_beams=4,
-            early_stopping=True,
-            length_penalty=0.8
-        )
-        
+        with self._model_lock:
+            self._activate(adapter, local_path)
+            # The input buffers are reused by the next batch, fill them under the lock
+            inputs = self.encoder.to_tensors(encoded)
+            with observe_stage("generate"):
+                if assisted:
+                    summary_ids = self._assisted_generate(inputs, settings)
+                else:
+                    summary_ids = self.model.generate(
+                        input_ids=inputs["input_ids"],
+                        attention_mask=inputs["attention_mask"],
+                        **settings
+                    )
+
         # Decode and return summary
-        summary = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        
-        print("Dialogue:")
-        print(text)
-        print("\nModel Summary:")
-        print(summary)
-        
-        return summary
\ No newline at end of file
+        with observe_stage("decode"):
+            summaries = self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+        BATCH_SIZE.observe(len(texts))
+        for ids in encoded:
+            INPUT_TOKENS.observe(len(ids))
+        for length in (summary_ids != self.tokenizer.pad_token_id).sum(dim=1).tolist():
+            OUTPUT_TOKENS.observe(length)
+
+        if echo_payloads():
+            for text, summary in zip(texts, summaries):
+                log_request("inference", "Prediction", dialogue=text, summary=summary)
+
+        return summaries
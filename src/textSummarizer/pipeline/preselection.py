@@ -0,0 +1,79 @@
+import re
+import math
+from collections import Counter
+
+_TERM = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class TurnPreselector:
+    """Fit over-length dialogues into the input budget by keeping their most salient turns
+
+    Turns are scored by TF-IDF cosine similarity to the whole dialogue, with
+    document frequencies taken over the dialogue's own turns, so names and
+    filler that appear in every turn count for little. The best-scoring turns
+    that fit the budget are kept in their original order, giving the model
+    one pass over the whole conversation instead of just its beginning.
+    """
+
+    def __init__(self, tokenizer, max_input_tokens: int):
+        self.tokenizer = tokenizer
+        # Room left once the tokenizer adds its special tokens
+        self.budget = max_input_tokens - tokenizer.num_special_tokens_to_add()
+
+    @staticmethod
+    def split_turns(text: str) -> list:
+        turns = [line for line in text.splitlines() if line.strip()]
+        if len(turns) == 1:
+            # Not a dialogue, fall back to sentences
+            turns = [s for s in _SENTENCE_END.split(turns[0]) if s.strip()]
+        return turns
+
+    @staticmethod
+    def score_turns(turns: list) -> list:
+        term_counts = [Counter(_TERM.findall(turn.lower())) for turn in turns]
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        idf = {term: math.log((1 + len(turns)) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+        vectors = []
+        for counts in term_counts:
+            vector = {term: count * idf[term] for term, count in counts.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            vectors.append({term: w / norm for term, w in vector.items()})
+
+        centroid = Counter()
+        for vector in vectors:
+            centroid.update(vector)
+        return [sum(w * centroid[term] for term, w in vector.items()) for vector in vectors]
+
+    def select(self, text: str):
+        """Shorten `text` to the input budget if it is over it
+
+        Returns:
+            tuple: (text to summarize, input tokens or None if not counted, tokens dropped)
+        """
+        # A token covers at least one byte, short inputs need no tokenizing
+        if len(text.encode()) <= self.budget:
+            return text, None, 0
+
+        turns = self.split_turns(text)
+        if not turns:
+            return text, 0, 0
+        lengths = [len(ids) for ids in self.tokenizer(
+            [turn + "\n" for turn in turns], add_special_tokens=False
+        )["input_ids"]]
+        total = sum(lengths)
+        if total <= self.budget:
+            return text, total, 0
+
+        scores = self.score_turns(turns)
+        kept, used = [], 0
+        for i in sorted(range(len(turns)), key=lambda i: scores[i], reverse=True):
+            if used + lengths[i] <= self.budget:
+                kept.append(i)
+                used += lengths[i]
+        if not kept:
+            # Every turn is over budget on its own, leave it to truncation
+            return text, total, total - self.budget
+
+        return "\n".join(turns[i] for i in sorted(kept)), total, total - used
@@ -0,0 +1,35 @@
+import argparse
+from dataclasses import replace
+from textSummarizer.config.configuration import ConfigurationManager
+from textSummarizer.components.serving_autotuner import ServingAutotuner
+from textSummarizer.logging import logger, configure_logging
+
+
+class ServingAutotunePipeline:
+    def __init__(self):
+        pass
+
+    def main(self, sample_file: str = None, num_samples: int = None):
+        config = ConfigurationManager()
+        configure_logging(config.get_logging_config())
+        autotune_config = config.get_autotune_config()
+        if sample_file:
+            autotune_config = replace(autotune_config, sample_file=sample_file)
+        if num_samples:
+            autotune_config = replace(autotune_config, num_samples=num_samples)
+
+        # Measure against the configured settings, not a previous tuning result
+        serving_config = config.get_serving_config(apply_tuned_profile=False)
+
+        autotuner = ServingAutotuner(config=autotune_config, serving_config=serving_config)
+        profile = autotuner.tune()
+        logger.info(f"Restart the server to serve with the tuned profile: {profile['generation']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune serving threads, batch size and generation settings")
+    parser.add_argument("--sample-file", help="JSONL of request bodies, defaults to the test split")
+    parser.add_argument("--num-samples", type=int)
+    args = parser.parse_args()
+
+    ServingAutotunePipeline().main(sample_file=args.sample_file, num_samples=args.num_samples)
@@ -1,8 +1,14 @@
+import os
+import sys
+import subprocess
 from textSummarizer.config.configuration import ConfigurationManager
 from textSummarizer.components.model_trainer import ModelTrainer
 from textSummarizer.logging import logger
 
 
+STAGE_MODULE = "textSummarizer.pipeline.stage_04_model_training"
+
+
 class ModelTrainerTrainingPipeline:
     def __init__(self):
         pass
@@ -10,5 +16,31 @@ class ModelTrainerTrainingPipeline:
     def main(self):
         config = ConfigurationManager()
         model_trainer_config = config.get_model_trainer_config()
+
+        # Fan out to several local processes unless we already are one of them
+        nproc = model_trainer_config.nproc_per_node
+        if nproc > 1 and "LOCAL_RANK" not in os.environ:
+            self.launch_distributed(nproc)
+            return
+
         model_trainer = ModelTrainer(config=model_trainer_config)
-        model_trainer.train()
\ No newline at end of file
+        model_trainer.train()
+
+    def launch_distributed(self, nproc: int):
+        """Re-run this stage data-parallel across nproc local processes with torchrun"""
+        cores = len(os.sched_getaffinity(0))
+        env = dict(os.environ)
+        env["OMP_NUM_THREADS"] = str(max(1, cores // nproc))
+
+        cmd = [
+            sys.executable, "-m", "torch.distributed.run",
+            "--standalone",
+            f"--nproc_per_node={nproc}",
+            "-m", STAGE_MODULE,
+        ]
+        logger.info(f"Launching data-parallel training: {' '.join(cmd)}")
+        subprocess.run(cmd, env=env, check=True)
+
+
+if __name__ == "__main__":
+    ModelTrainerTrainingPipeline().main()
@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import signal
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from textSummarizer.constant import EVALUATION_ADAPTER_ENV
+from textSummarizer.entity import TrainingJobConfig
+from textSummarizer.logging import logger
+
+
+class JobAlreadyRunningError(Exception):
+    """Another training run holds the training lock"""
+
+
+class JobNotFoundError(Exception):
+    """No training job with the given id"""
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    log_file: str
+    status: str = "running"
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    returncode: Optional[int] = None
+    metrics: Optional[dict] = None
+    adapter_swapped: bool = False
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    process: Optional[subprocess.Popen] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "metrics": self.metrics,
+            "adapter_swapped": self.adapter_swapped,
+            "error": self.error,
+            "log_file": self.log_file,
+        }
+
+
+class TrainingJobManager:
+    """Runs the training pipeline as a managed subprocess, one run at a time
+
+    Output goes straight to a per-job log file instead of being buffered in
+    memory. A lock file holding the run's pid guards against concurrent runs,
+    including runs started by another server process or left running by one
+    that restarted. Each run evaluates the adapter it trained; when it
+    finishes and those metrics pass the configured gate, the adapter is
+    copied out of `adapter_dir` (which the next run overwrites) and
+    `on_success` is called with the copy so the server can swap it in. It
+    returns whether it did; only then is the copy recorded as the live
+    adapter, which the server loads again at startup.
+    """
+
+    def __init__(self, config: TrainingJobConfig, on_success: Callable[[str], bool] = None):
+        self.config = config
+        self.on_success = on_success
+        self.lock_file = os.path.join(self.config.root_dir, "train.lock")
+        # Path and metrics of the adapter last swapped in, the baseline for the next run
+        self.live_adapter_file = os.path.join(self.config.root_dir, "live_adapter.json")
+
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = None
+
+    def start(self) -> TrainingJob:
+        """Launch a training run
+
+        Raises:
+            JobAlreadyRunningError: if a run is already in progress
+        """
+        with self._lock:
+            if self._active is not None and not self._active.finished:
+                raise JobAlreadyRunningError(f"Training job {self._active.job_id} is still running")
+            os.makedirs(self.config.root_dir, exist_ok=True)
+            self._acquire_lock_file()
+
+            job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+            log_file = os.path.join(self.config.root_dir, f"{job_id}.log")
+            # Run with the server's interpreter so the same environment is used
+            command = [sys.executable if c == "python" else c for c in self.config.command]
+            # The run's evaluation stage must score the adapter this run trains
+            env = {**os.environ, EVALUATION_ADAPTER_ENV: str(self.config.adapter_dir)}
+            # Serving's tokenizer setting is unsafe with the run's forked dataloader workers
+            env.pop("TOKENIZERS_PARALLELISM", None)
+
+            try:
+                with open(log_file, "wb") as log:
+                    process = subprocess.Popen(
+                        command,
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        stdin=subprocess.DEVNULL,
+                        env=env,
+                        start_new_session=True,
+                    )
+            except Exception:
+                self._release_lock_file()
+                raise
+            # The run outlives this server if it crashes, so the lock names the run
+            self._write_lock_pid(process.pid)
+
+            job = TrainingJob(job_id=job_id, log_file=log_file, process=process)
+            self._jobs[job_id] = job
+            self._active = job
+
+        logger.info(f"Started training job {job_id} (pid {process.pid}), logging to {log_file}")
+        threading.Thread(target=self._watch, args=(job,), name=f"train-{job_id}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> TrainingJob:
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise JobNotFoundError(f"Unknown training job {job_id}")
+
+    def list(self) -> list:
+        return sorted(self._jobs.values(), key=lambda job: job.started_at, reverse=True)
+
+    def cancel(self, job_id: str) -> TrainingJob:
+        """Ask a running job to stop, killing it if it ignores SIGTERM past the grace period"""
+        job = self.get(job_id)
+        if job.finished:
+            return job
+
+        job.cancel_requested = True
+        logger.info(f"Cancelling training job {job_id}")
+        self._signal(job, signal.SIGTERM)
+
+        def _kill():
+            if not job.finished:
+                logger.warning(f"Training job {job_id} ignored SIGTERM, killing it")
+                self._signal(job, signal.SIGKILL)
+
+        timer = threading.Timer(self.config.cancel_grace_period, _kill)
+        timer.daemon = True
+        timer.start()
+        return job
+
+    def tail(self, job_id: str, lines: int = 50) -> list:
+        """Last `lines` lines of a job's log"""
+        job = self.get(job_id)
+        with open(job.log_file, "rb") as f:
+            # Logs can be huge, only read the end of the file
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 256 * lines))
+            return f.read().decode(errors="replace").splitlines()[-lines:]
+
+    @staticmethod
+    def _signal(job: TrainingJob, sig):
+        try:
+            # The job runs in its own session, signal the whole process group
+            os.killpg(job.process.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _watch(self, job: TrainingJob):
+        try:
+            job.returncode = job.process.wait()
+
+            if job.cancel_requested:
+                job.status = "cancelled"
+            elif job.returncode != 0:
+                job.status = "failed"
+                job.error = f"Training exited with code {job.returncode}"
+            else:
+                self._evaluate_and_swap(job)
+        except Exception as e:
+            logger.exception(e)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._release_lock_file()
+            logger.info(f"Training job {job.job_id} finished with status {job.status}")
+
+    def _evaluate_and_swap(self, job: TrainingJob):
+        metric_file = self.config.metric_file_name
+        if not os.path.exists(metric_file) or os.path.getmtime(metric_file) < job.started_at:
+            job.status = "failed"
+            job.error = f"Run produced no evaluation metrics at {metric_file}"
+            return
+
+        # Imported here to keep pandas off the server's startup path
+        import pandas as pd
+
+        scores = pd.read_csv(metric_file, index_col=0).iloc[0]
+        job.metrics = {name: float(value) for name, value in scores.items()}
+        rouge_l = job.metrics.get("rougeL", 0.0)
+        if rouge_l < self.config.min_rougeL:
+            job.status = "rejected"
+            job.error = f"rougeL {rouge_l} is below the required {self.config.min_rougeL}"
+            return
+
+        live = self.live_adapter()
+        live_rouge_l = live.get("metrics", {}).get("rougeL")
+        if live_rouge_l is not None and rouge_l < live_rouge_l - self.config.max_rougeL_drop:
+            job.status = "rejected"
+            job.error = (f"rougeL {rouge_l} is more than {self.config.max_rougeL_drop} "
+                         f"below the live adapter's {live_rouge_l}")
+            return
+
+        job.status = "succeeded"
+        if self.on_success is None:
+            return
+        adapter_path = os.path.join(self.config.root_dir, "adapters", job.job_id)
+        shutil.copytree(self.config.adapter_dir, adapter_path)
+        if not self.on_success(adapter_path):
+            shutil.rmtree(adapter_path, ignore_errors=True)
+            return
+
+        job.adapter_swapped = True
+        self._save_live_adapter({"job_id": job.job_id, "adapter_path": adapter_path, "metrics": job.metrics})
+        if live:
+            # The server has loaded the new weights, the old copy is no longer needed
+            shutil.rmtree(live["adapter_path"], ignore_errors=True)
+
+    def live_adapter(self) -> dict:
+        """The adapter last swapped in by a job, as {"job_id", "adapter_path", "metrics"}
+
+        Empty if no job swapped one in, or if its files are gone; the served
+        adapter is then the configured one and there is no baseline score.
+        """
+        if not os.path.exists(self.live_adapter_file):
+            return {}
+        with open(self.live_adapter_file) as f:
+            live = json.load(f)
+        if not os.path.isdir(live["adapter_path"]):
+            logger.warning(f"Live adapter {live['adapter_path']} is missing, dropping {self.live_adapter_file}")
+            os.remove(self.live_adapter_file)
+            return {}
+        return live
+
+    def _save_live_adapter(self, live: dict):
+        tmp_file = f"{self.live_adapter_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(live, f, indent=2)
+        os.replace(tmp_file, self.live_adapter_file)
+
+    def _acquire_lock_file(self):
+        try:
+            fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self._lock_holder_alive():
+                raise JobAlreadyRunningError(f"Training lock {self.lock_file} is held by another process")
+            logger.warning(f"Removing stale training lock {self.lock_file}")
+            os.remove(self.lock_file)
+            fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+        with os.fdopen(fd, "w") as f:
+            # Replaced by the run's pid once it is started
+            f.write(str(os.getpid()))
+
+    def _write_lock_pid(self, pid: int):
+        tmp_file = f"{self.lock_file}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write(str(pid))
+        # Atomic, so a concurrent check never reads a half-written pid
+        os.replace(tmp_file, self.lock_file)
+
+    def _lock_holder_alive(self) -> bool:
+        try:
+            with open(self.lock_file) as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+        except (ValueError, OSError):
+            return False
+        return True
+
+    def _release_lock_file(self):
+        try:
+            os.remove(self.lock_file)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,106 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+
+# Seconds, from sub-millisecond tokenization up to multi-second beam search
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 768, 1024, 2048)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+QUEUE_WAIT = Histogram(
+    "textsummarizer_queue_wait_seconds",
+    "Time a request spent queued before inference started",
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "textsummarizer_inference_stage_seconds",
+    "Time spent in each inference stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+INPUT_TOKENS = Histogram(
+    "textsummarizer_input_tokens",
+    "Input length in tokens after truncation",
+    buckets=TOKEN_BUCKETS,
+)
+OUTPUT_TOKENS = Histogram(
+    "textsummarizer_output_tokens",
+    "Generated summary length in tokens",
+    buckets=TOKEN_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+    "textsummarizer_batch_size",
+    "Number of inputs per generate call",
+    buckets=BATCH_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "textsummarizer_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+DRAFT_TOKENS = Counter(
+    "textsummarizer_draft_tokens_total",
+    "Assisted generation draft tokens, proposed and accepted by the main model",
+    ["result"],
+)
+PRESELECTED_INPUTS = Counter(
+    "textsummarizer_preselected_inputs_total",
+    "Over-length inputs shortened to their most salient turns",
+)
+PRESELECTION_DROPPED_TOKENS = Histogram(
+    "textsummarizer_preselection_dropped_tokens",
+    "Input tokens left out by extractive pre-selection, per shortened input",
+    buckets=TOKEN_BUCKETS,
+)
+BULK_QUEUE_WAIT = Histogram(
+    "textsummarizer_bulk_queue_wait_seconds",
+    "Time a bulk record waited for a free queue slot before being queued",
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "textsummarizer_requests_in_flight",
+    "Prediction requests currently queued or running",
+)
+REJECTED = Counter(
+    "textsummarizer_requests_rejected_total",
+    "Prediction requests rejected before running, by reason",
+    ["reason"],
+)
+
+# Resolve label children once so the request path only pays for observe()
+_STAGES = {stage: STAGE_DURATION.labels(stage) for stage in ("preselect", "tokenize", "generate", "decode")}
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Time the enclosed block into the inference stage histogram
+
+    Args:
+        stage (str): One of preselect, tokenize, generate or decode
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _STAGES[stage].observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a lookup in one of the serving caches"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text format
+
+    Returns:
+        tuple: (payload bytes, content type)
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,60 @@
+import os
+import torch
+from textSummarizer.logging import logger
+
+
+def cpu_supports_bf16() -> bool:
+    """Check whether the CPU has native bf16 support (AVX512-BF16 or AMX)
+
+    Returns:
+        bool: True if bf16 autocast will run on native instructions
+    """
+    for check in ("_is_avx512_bf16_supported", "_is_amx_tile_supported"):
+        fn = getattr(torch.cpu, check, None)
+        if fn is not None and fn():
+            return True
+    return False
+
+
+def fused_optimizer_supported() -> bool:
+    """The fused AdamW kernel is available on CPU from torch 2.4 onwards"""
+    major, minor = (int(v) for v in torch.__version__.split(".")[:2])
+    return (major, minor) >= (2, 4)
+
+
+def partition_cores(rank: int, world_size: int) -> list:
+    """Pin this process to its own contiguous slice of the available cores
+
+    Args:
+        rank (int): Index of this process among its local peers
+        world_size (int): Number of local processes sharing the machine
+
+    Returns:
+        list: Cores this process is now allowed to run on
+    """
+    cores = sorted(os.sched_getaffinity(0))
+    per_rank = max(1, len(cores) // world_size)
+    start = (rank * per_rank) % len(cores)
+    own = cores[start:start + per_rank]
+    os.sched_setaffinity(0, own)
+    logger.info(f"Rank {rank}/{world_size} pinned to cores {own[0]}-{own[-1]}")
+    return own
+
+
+def configure_torch_threads(num_threads: int = 0) -> int:
+    """Pin the number of intra-op threads torch uses
+
+    Args:
+        num_threads (int, optional): Threads to use. 0 means one per
+            physical core available to this process. Defaults to 0.
+
+    Returns:
+        int: Number of intra-op threads in effect
+    """
+    if num_threads <= 0:
+        # Hyperthreads rarely help GEMM-bound workloads, use half the logical cores
+        num_threads = max(1, len(os.sched_getaffinity(0)) // 2)
+
+    torch.set_num_threads(num_threads)
+    logger.info(f"Using {num_threads} intra-op threads")
+    return num_threads